@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+下载性能基准测试
+
+在本地启动一个模拟数据集仓库的 HTTP 服务，生成指定数量和大小分布的合成 package.tar.gz，
+然后分别用各个下载引擎（sequential / parallel / async）下载同一个合成配置，
+统计耗时、吞吐量和峰值内存，并输出机器可读的 JSON 结果用于回归跟踪。
+
+每次测量都在独立的子进程中进行，因此峰值 RSS 互不干扰，缓存目录每次都是全新的。
+
+使用方法:
+    python benchmarks/bench_download.py --count 200 --mean-size 65536
+    python benchmarks/bench_download.py --latency 0.05 --bandwidth 2000000 --error-rate 0.02
+    python benchmarks/bench_download.py --engines sequential async --repeat 5 --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import socketserver
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+CONFIG_NAME = "bench-synthetic"
+ENGINES = ("sequential", "parallel", "async")
+
+
+def _dataset_names(count: int) -> list:
+    return [f"bench/synthetic/ds{i:05d}" for i in range(count)]
+
+
+def _sample_sizes(count: int, dist: str, mean_size: int, rng: random.Random) -> list:
+    """按给定分布生成每个数据集的原始数据大小（字节）。"""
+    if dist == "fixed":
+        return [mean_size] * count
+    if dist == "uniform":
+        return [rng.randint(1, 2 * mean_size) for _ in range(count)]
+    # 对数正态分布：sigma=1 时均值为 exp(mu + 0.5)
+    mu = max(0.0, math.log(mean_size) - 0.5)
+    return [max(1, int(rng.lognormvariate(mu, 1.0))) for _ in range(count)]
+
+
+def build_hub(root: Path, count: int, dist: str, mean_size: int, seed: int) -> int:
+    """
+    在 root 下生成合成数据集仓库，返回全部 package.tar.gz 的总字节数。
+
+    数据内容为随机字节，几乎不可压缩，压缩包大小约等于原始大小。
+    """
+    rng = random.Random(seed)
+    total = 0
+    for name, size in zip(_dataset_names(count), _sample_sizes(count, dist, mean_size, rng)):
+        dataset_dir = root / name
+        dataset_dir.mkdir(parents=True, exist_ok=True)
+        payload = dataset_dir / "train.csv"
+        payload.write_bytes(rng.getrandbits(8 * size).to_bytes(size, "little"))
+        package = dataset_dir / "package.tar.gz"
+        with tarfile.open(package, "w:gz") as tar:
+            tar.add(payload, arcname="train.csv")
+        payload.unlink()
+        total += package.stat().st_size
+    return total
+
+
+class _HubHandler(SimpleHTTPRequestHandler):
+    """支持注入延迟、单连接限速和随机错误的静态文件处理器。"""
+
+    latency = 0.0
+    bandwidth = 0
+    error_rate = 0.0
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate:
+            with self.rng_lock:
+                failed = self.rng.random() < self.error_rate
+            if failed:
+                self.send_error(503, "injected error")
+                return
+        f = self.send_head()
+        if f:
+            try:
+                self._copy(f)
+            finally:
+                f.close()
+
+    def _copy(self, f) -> None:
+        chunk_size = 64 * 1024
+        start = time.perf_counter()
+        sent = 0
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            if self.bandwidth:
+                delay = sent / self.bandwidth - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class _HubServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+def _run_engine(engine: str, base_url: str, cache_dir: Path, count: int, max_workers: int) -> dict:
+    """在当前（子）进程中执行一次下载，返回测量结果。"""
+    import resource
+
+    sys.path.insert(0, str(REPO_ROOT / "src"))
+    os.environ["SIM_DATASETS_MODELSCOPE_BASE_URL"] = base_url
+
+    from sim_datasets import ProgressReporter, get_registry, utils
+
+    get_registry().register(CONFIG_NAME, _dataset_names(count))
+    reporter = ProgressReporter(quiet=True)
+
+    start = time.perf_counter()
+    if engine == "sequential":
+        result = utils.download_dataset(CONFIG_NAME, source="modelscope", cache_dir=cache_dir, reporter=reporter)
+    elif engine == "parallel":
+        result = utils.download_dataset_parallel(
+            CONFIG_NAME, source="modelscope", cache_dir=cache_dir, max_workers=max_workers, reporter=reporter
+        )
+    elif engine == "async":
+        import asyncio
+
+        from sim_datasets import async_utils
+
+        result = asyncio.run(
+            async_utils.adownload_dataset(
+                CONFIG_NAME, source="modelscope", cache_dir=cache_dir, max_concurrency=max_workers, reporter=reporter
+            )
+        )
+    else:
+        raise ValueError(f"未知的下载引擎: {engine}")
+    wall_time = time.perf_counter() - start
+
+    # Linux 上 ru_maxrss 单位为 KiB，macOS 上为字节
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "wall_time": wall_time,
+        "success_count": result["success_count"],
+        "failed_count": result["failed_count"],
+        "metrics": result["metrics"],
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "peak_rss_children_bytes": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+def _engine_available(engine: str) -> bool:
+    if engine != "async":
+        return True
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _measure(engine: str, base_url: str, workdir: Path, run_index: int, args) -> dict:
+    cache_dir = workdir / f"cache-{engine}-{run_index}"
+    cmd = [
+        sys.executable, str(Path(__file__).resolve()), "--_run", engine,
+        "--_base-url", base_url, "--_cache-dir", str(cache_dir),
+        "--count", str(args.count), "--max-workers", str(args.max_workers),
+    ]
+    proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _summarize(engine: str, runs: list, count: int, hub_bytes: int) -> dict:
+    wall_times = [run["wall_time"] for run in runs]
+    median_wall = statistics.median(wall_times)
+    latency_p95 = [run["metrics"]["latency"]["p95"] for run in runs if run["metrics"]["latency"]["p95"] is not None]
+    return {
+        "engine": engine,
+        "runs": len(runs),
+        "wall_time_median": median_wall,
+        "wall_time_min": min(wall_times),
+        "wall_time_max": max(wall_times),
+        "throughput_bytes_per_second": hub_bytes / median_wall if median_wall > 0 else 0.0,
+        "datasets_per_second": count / median_wall if median_wall > 0 else 0.0,
+        "success_count_median": statistics.median(run["success_count"] for run in runs),
+        "failed_count_median": statistics.median(run["failed_count"] for run in runs),
+        "retries_median": statistics.median(run["metrics"]["retries"] for run in runs),
+        "latency_p95_median": statistics.median(latency_p95) if latency_p95 else None,
+        "peak_rss_bytes_max": max(run["peak_rss_bytes"] for run in runs),
+        "peak_rss_children_bytes_max": max(run["peak_rss_children_bytes"] for run in runs),
+        "raw": runs,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="sim-datasets 下载性能基准测试")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES), help="要测试的下载引擎")
+    parser.add_argument("--count", type=int, default=100, help="合成数据集数量 (默认: 100)")
+    parser.add_argument("--mean-size", type=int, default=32 * 1024, help="单个数据集平均大小，字节 (默认: 32768)")
+    parser.add_argument("--size-dist", choices=["fixed", "uniform", "lognormal"], default="lognormal", help="数据集大小分布 (默认: lognormal)")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求注入的延迟，秒")
+    parser.add_argument("--bandwidth", type=int, default=0, help="单连接带宽上限，字节/秒，0 表示不限速")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 HTTP 503 的概率，下载端会退避后重试")
+    parser.add_argument("--max-workers", type=int, default=8, help="parallel / async 引擎的并发数 (默认: 8)")
+    parser.add_argument("--repeat", type=int, default=3, help="每个引擎重复次数，结果取中位数 (默认: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子，保证合成数据与错误注入可复现")
+    parser.add_argument("--output", type=Path, help="将 JSON 结果写入该文件")
+    # 以下参数仅供子进程内部使用
+    parser.add_argument("--_run", help=argparse.SUPPRESS)
+    parser.add_argument("--_base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--_cache-dir", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._run:
+        print(json.dumps(_run_engine(args._run, args._base_url, args._cache_dir, args.count, args.max_workers)))
+        return 0
+
+    engines = [engine for engine in args.engines if _engine_available(engine)]
+    skipped = sorted(set(args.engines) - set(engines))
+    if skipped:
+        print(f"跳过不可用的引擎: {', '.join(skipped)}", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory(prefix="sim-datasets-bench-") as tmp:
+        workdir = Path(tmp)
+        hub_root = workdir / "hub"
+        hub_bytes = build_hub(hub_root, args.count, args.size_dist, args.mean_size, args.seed)
+
+        handler = type("Handler", (_HubHandler,), {
+            "latency": args.latency,
+            "bandwidth": args.bandwidth,
+            "error_rate": args.error_rate,
+            "rng": random.Random(args.seed),
+        })
+        with _HubServer(("127.0.0.1", 0), partial(handler, directory=str(hub_root))) as httpd:
+            thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+            thread.start()
+            base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+            results = []
+            for engine in engines:
+                runs = [_measure(engine, base_url, workdir, i, args) for i in range(args.repeat)]
+                results.append(_summarize(engine, runs, args.count, hub_bytes))
+
+            httpd.shutdown()
+            thread.join(timeout=5)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {
+            "count": args.count,
+            "mean_size": args.mean_size,
+            "size_dist": args.size_dist,
+            "latency": args.latency,
+            "bandwidth": args.bandwidth,
+            "error_rate": args.error_rate,
+            "max_workers": args.max_workers,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "hub_bytes": hub_bytes,
+        },
+        "results": results,
+    }
+
+    print(f"{'引擎':<12}{'耗时(中位数)':>14}{'吞吐 MB/s':>12}{'成功':>8}{'失败':>8}{'峰值RSS MB':>12}")
+    for item in results:
+        print(
+            f"{item['engine']:<12}{item['wall_time_median']:>14.3f}"
+            f"{item['throughput_bytes_per_second'] / 1e6:>12.2f}"
+            f"{item['success_count_median']:>8g}{item['failed_count_median']:>8g}"
+            f"{max(item['peak_rss_bytes_max'], item['peak_rss_children_bytes_max']) / 1e6:>12.1f}"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+启动性能基准测试
+
+集群上成千上万个短生命周期的工作进程都会执行 import sim_datasets 或 sim-datasets --list-only，
+启动开销会被放大。本脚本在全新的子进程中反复测量以下场景，扣除空解释器启动时间后与预算比较，
+超出预算或加载了不该加载的重量级模块时返回非零退出码，可直接用于 CI 回归检查。
+
+    import        import sim_datasets
+    list          import sim_datasets; get_datasets_list(<config>)
+    cache         对已全部缓存的配置执行 plan_download（纯本地缓存查询）
+    cli-list      python -m sim_datasets <config> --list-only
+
+使用方法:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 30 --output startup.json
+    python benchmarks/bench_startup.py --budget-import 20 --budget-cli 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# 只在真正下载时才允许加载的模块（空解释器启动时已由 site 加载的除外）
+HEAVY_MODULES = ("requests", "tarfile", "multiprocessing", "aiohttp", "asyncio", "zipfile")
+
+_CHECK_MODULES = (
+    "import json, sys; "
+    "print(json.dumps([m for m in {heavy!r} if m in sys.modules]))"
+)
+
+
+def _scenarios(config_name: str, cache_dir: Path) -> dict:
+    """场景名 -> (python 参数, 用于检查 sys.modules 的等价代码)。"""
+    list_code = f"import sim_datasets; sim_datasets.get_datasets_list({config_name!r})"
+    cache_code = (
+        "import sim_datasets; "
+        f"assert sim_datasets.plan_download({config_name!r}, source='modelscope', cache_dir={str(cache_dir)!r})['fetch_count'] == 0"
+    )
+    return {
+        "import": (["-c", "import sim_datasets"], "import sim_datasets"),
+        "list": (["-c", list_code], list_code),
+        "cache": (["-c", cache_code], cache_code),
+        "cli-list": (
+            ["-m", "sim_datasets", config_name, "--list-only"],
+            f"from sim_datasets.__main__ import main; main([{config_name!r}, '--list-only'])",
+        ),
+    }
+
+
+def _time_command(args: list, env: dict, repeat: int) -> list:
+    """在全新子进程中执行 repeat 次，返回每次的耗时（毫秒）。"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], env=env, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _loaded_heavy_modules(code: str, env: dict) -> list:
+    check = f"{code}; {_CHECK_MODULES.format(heavy=HEAVY_MODULES)}"
+    proc = subprocess.run([sys.executable, "-c", check], env=env, check=True, capture_output=True, text=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _populate_cache(config_name: str, cache_dir: Path, env: dict) -> None:
+    """为 cache 场景构造一个全部命中的缓存目录。"""
+    code = "\n".join([
+        "from pathlib import Path",
+        "from sim_datasets import get_datasets_list",
+        f"for dataset in get_datasets_list({config_name!r}):",
+        f"    dataset_dir = Path({str(cache_dir)!r}) / dataset",
+        "    dataset_dir.mkdir(parents=True, exist_ok=True)",
+        "    (dataset_dir / 'train.csv').write_text('x')",
+    ])
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="sim-datasets 启动性能基准测试")
+    parser.add_argument("--config", default="srbench1.0", help="用于 list / cache / cli-list 场景的配置 (默认: srbench1.0)")
+    parser.add_argument("--repeat", type=int, default=15, help="每个场景重复次数，结果取中位数 (默认: 15)")
+    parser.add_argument("--budget-import", type=float, default=30.0, help="import 场景的额外开销预算，毫秒 (默认: 30)")
+    parser.add_argument("--budget-list", type=float, default=40.0, help="list 与 cache 场景的额外开销预算，毫秒 (默认: 40)")
+    parser.add_argument("--budget-cli", type=float, default=60.0, help="cli-list 场景的额外开销预算，毫秒 (默认: 60)")
+    parser.add_argument("--output", type=Path, help="将 JSON 结果写入该文件")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT / "src"), env.get("PYTHONPATH")]))
+    # 安装后的包总有 .pyc，这里把字节码写到临时目录，避免每次启动都重新编译
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    budgets = {
+        "import": args.budget_import,
+        "list": args.budget_list,
+        "cache": args.budget_list,
+        "cli-list": args.budget_cli,
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="sim-datasets-startup-") as tmp:
+        env["PYTHONPYCACHEPREFIX"] = str(Path(tmp) / "pycache")
+        cache_dir = Path(tmp) / "cache"
+        _populate_cache(args.config, cache_dir, env)
+
+        # 预热一次，确保 .pyc 已生成，不把编译时间算进结果
+        subprocess.run([sys.executable, "-c", "import sim_datasets, sim_datasets.__main__, sim_datasets.plan"], env=env, check=True)
+        baseline = statistics.median(_time_command(["-c", "pass"], env, args.repeat))
+        preloaded = set(_loaded_heavy_modules("pass", env))
+
+        for name, (cmd, code) in _scenarios(args.config, cache_dir).items():
+            timings = _time_command(cmd, env, args.repeat)
+            median = statistics.median(timings)
+            heavy = sorted(set(_loaded_heavy_modules(code, env)) - preloaded)
+            overhead = median - baseline
+            results.append({
+                "scenario": name,
+                "median_ms": median,
+                "min_ms": min(timings),
+                "overhead_ms": overhead,
+                "budget_ms": budgets[name],
+                "heavy_modules": heavy,
+                "ok": overhead <= budgets[name] and not heavy,
+                "raw_ms": timings,
+            })
+
+    print(f"空解释器启动: {baseline:.1f} ms")
+    print(f"{'场景':<12}{'中位数 ms':>12}{'额外开销 ms':>14}{'预算 ms':>10}  结果")
+    for item in results:
+        status = "OK" if item["ok"] else "超出预算"
+        if item["heavy_modules"]:
+            status = f"加载了 {', '.join(item['heavy_modules'])}"
+        print(
+            f"{item['scenario']:<12}{item['median_ms']:>12.1f}{item['overhead_ms']:>14.1f}"
+            f"{item['budget_ms']:>10.0f}  {status}"
+        )
+
+    if args.output:
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": args.config,
+            "repeat": args.repeat,
+            "baseline_ms": baseline,
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"结果已写入 {args.output}")
+
+    return 0 if all(item["ok"] for item in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
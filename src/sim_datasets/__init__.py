@@ -12,16 +12,48 @@ __version__ = "0.1.1"
 __author__ = "Ziwen Zhang, Kai Li"
 __email__ = "244824379@qq.com"
 
-from .utils import (
-    get_datasets_list,
-    download_single_dataset,
-    download_dataset,
-    download_dataset_parallel
-)
-
-__all__ = [
-    "get_datasets_list",
-    "download_single_dataset", 
-    "download_dataset",
-    "download_dataset_parallel"
-] 
\ No newline at end of file
+# 公开接口在首次访问时才导入对应子模块，import sim_datasets 不会加载 requests、tarfile、
+# multiprocessing 等重量级依赖；大量短生命周期的工作进程只为列出配置或查询缓存时启动更快。
+_LAZY_EXPORTS = {
+    "get_datasets_list": "utils",
+    "download_single_dataset": "utils",
+    "download_dataset": "utils",
+    "download_dataset_parallel": "utils",
+    "ConfigRegistry": "registry",
+    "get_registry": "registry",
+    "DatasetPack": "storage",
+    "open_pack": "storage",
+    "pack_datasets": "storage",
+    "adownload_single_dataset": "async_utils",
+    "adownload_dataset": "async_utils",
+    "ProgressReporter": "events",
+    "MetricsAggregator": "events",
+    "export_cache": "offline",
+    "import_cache": "offline",
+    "extract_archive": "decompress",
+    "plan_download": "plan",
+}
+
+# 子模块同样按需导入，保持 import sim_datasets; sim_datasets.utils 这类旧写法可用
+_SUBMODULES = ("utils", "registry", "storage", "async_utils", "events", "offline", "decompress", "plan")
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    import importlib
+
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        if name in _SUBMODULES:
+            # import_module 会把子模块绑定到包的命名空间，之后不再经过 __getattr__
+            return importlib.import_module(f".{name}", __name__)
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,26 +4,114 @@ sim-datasets 命令行接口
 
 使用方法:
     python -m sim_datasets <config_name> [options]
+    python -m sim_datasets export <config_name> <output.tar> [options]
+    python -m sim_datasets import <archive.tar> [options]
     
 示例:
     python -m sim_datasets llm-srbench
     python -m sim_datasets srbench1.0 --source huggingface
     python -m sim_datasets srsd --parallel --max-workers 10
+    python -m sim_datasets srbench1.0 --plan
+    python -m sim_datasets export srbench1.0 srbench1.0.tar
+    python -m sim_datasets import srbench1.0.tar --cache-dir /scratch/.sim_datasets
 """
 
 import argparse
 import sys
 from pathlib import Path
 
-from .utils import (
-    get_datasets_list,
-    download_dataset,
-    download_dataset_parallel
-)
+
+def offline_main(argv):
+    """处理 export / import 子命令，用于离线集群之间迁移缓存"""
+    from .offline import export_cache, import_cache
+    
+    parser = argparse.ArgumentParser(prog="sim-datasets", description="导出或导入离线数据集缓存")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = subparsers.add_parser("export", help="将配置的缓存内容导出为单个 tar 包")
+    export_parser.add_argument("config_name", help="数据集配置名称")
+    export_parser.add_argument("output", type=Path, help="输出文件路径 (以 .gz 结尾时启用 gzip 压缩)")
+    export_parser.add_argument("--cache-dir", type=Path, help="缓存目录 (默认: 当前目录下的 .sim_datasets)")
+    
+    import_parser = subparsers.add_parser("import", help="从导出的 tar 包恢复缓存")
+    import_parser.add_argument("archive", type=Path, help="export 生成的 tar 包")
+    import_parser.add_argument("--cache-dir", type=Path, help="目标缓存目录 (默认: 当前目录下的 .sim_datasets)")
+    import_parser.add_argument("--max-workers", type=int, help="并行写入线程数")
+    import_parser.add_argument("--no-verify", action="store_true", help="跳过 sha256 校验")
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        if args.command == "export":
+            result = export_cache(args.config_name, args.output, cache_dir=args.cache_dir)
+            return 0 if not result["missing"] else 1
+        result = import_cache(
+            args.archive,
+            cache_dir=args.cache_dir,
+            max_workers=args.max_workers,
+            verify=not args.no_verify
+        )
+        return 0 if result["success"] else 1
+    
+    except (FileNotFoundError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+
+
+def _format_bytes(size):
+    """将字节数格式化为便于阅读的字符串"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} TB"
 
 
-def main():
+def plan_main(args):
+    """处理 --plan，输出下载计划；需要下载的数据集存在错误或剩余空间放不下压缩包时返回 1"""
+    import json
+    
+    from .plan import plan_download
+    
+    plan = plan_download(
+        args.config_name,
+        source=args.source,
+        proxy=args.proxy,
+        cache_dir=args.cache_dir,
+        storage=args.storage,
+        max_workers=args.max_workers
+    )
+    
+    if args.json:
+        print(json.dumps(plan, ensure_ascii=False))
+    else:
+        print(f"配置: {plan['config_name']} (共 {plan['total_datasets']} 个数据集)")
+        print(f"缓存目录: {plan['cache_dir']}")
+        print(f"已缓存: {len(plan['cached'])}")
+        print(f"需要下载: {plan['fetch_count']}")
+        if plan['fetch_count']:
+            print(f"数据源: {plan['source']}")
+            print(f"总大小: {_format_bytes(plan['total_bytes'])}")
+            if plan['unknown_size']:
+                print(f"大小未知: {len(plan['unknown_size'])} 个数据集")
+            if plan['throughput_bytes_per_second']:
+                print(f"实测吞吐: {plan['throughput_bytes_per_second'] / 1e6:.2f} MB/s")
+            if plan['estimated_seconds'] is not None:
+                print(f"预计耗时: {plan['estimated_seconds']:.1f} 秒")
+            for dataset, error in plan['errors'].items():
+                print(f"  ❌ {dataset}: {error}")
+        print(f"磁盘剩余: {_format_bytes(plan['free_bytes'])}{'' if plan['archives_fit_on_disk'] else ' (不足以存放压缩包)'}")
+        print(f"计划耗时: {plan['plan_seconds']:.2f} 秒")
+    
+    return 0 if plan['archives_fit_on_disk'] and not plan['errors'] else 1
+
+
+def main(argv=None):
     """主函数，处理命令行参数并执行相应的操作"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in ("export", "import"):
+        return offline_main(argv)
+    
     parser = argparse.ArgumentParser(
         description="下载和管理符号回归数据集",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -33,6 +121,9 @@ def main():
   %(prog)s srbench1.0 --source huggingface  # 从 Hugging Face 下载
   %(prog)s srsd --parallel --max-workers 10  # 并行下载，最大10个进程
   %(prog)s bio_pop_growth --proxy http://proxy:8080  # 使用代理
+  %(prog)s srbench1.0 --plan --json          # 仅估算需要下载的数据量，输出 JSON
+  %(prog)s export srbench1.0 srbench1.0.tar  # 导出缓存供离线集群使用
+  %(prog)s import srbench1.0.tar             # 在离线集群上恢复缓存
         """
     )
     
@@ -70,7 +161,26 @@ def main():
         "--max-workers",
         type=int,
         default=5,
-        help="并行下载时的最大进程数 (默认: 5)"
+        help="并行下载时的最大进程数，--plan 时为并发 HEAD 请求数 (默认: 5)"
+    )
+    
+    parser.add_argument(
+        "--storage",
+        choices=["files", "pack"],
+        default="files",
+        help="存储后端: files 保留解压目录，pack 打包为单个容器文件 (默认: files)"
+    )
+    
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="不输出逐个数据集的下载状态，只显示最终结果"
+    )
+    
+    parser.add_argument(
+        "--event-log",
+        type=Path,
+        help="将结构化下载事件以 JSON-lines 格式追加写入该文件"
     )
     
     parser.add_argument(
@@ -79,9 +189,27 @@ def main():
         help="仅列出数据集，不下载"
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="仅生成下载计划: 对比缓存，估算需下载的数据集数、总字节数、预计耗时和磁盘剩余空间"
+    )
+    
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="以 JSON 格式输出下载计划 (配合 --plan 使用)"
+    )
+    
+    args = parser.parse_args(argv)
+    
+    # 下载相关模块在需要时才导入，保证 --list-only / --plan 启动足够快
+    from .utils import get_datasets_list
     
     try:
+        if args.plan:
+            return plan_main(args)
+        
         # 获取数据集列表
         print(f"正在获取数据集列表: {args.config_name}")
         datasets_list = get_datasets_list(args.config_name)
@@ -100,6 +228,11 @@ def main():
         if args.parallel:
             print(f"并行下载，最大进程数: {args.max_workers}")
         
+        from .events import ProgressReporter
+        from .utils import download_dataset, download_dataset_parallel
+        
+        reporter = ProgressReporter(quiet=args.quiet, log_path=args.event_log)
+        
         # 执行下载
         if args.parallel:
             result = download_dataset_parallel(
@@ -107,23 +240,35 @@ def main():
                 source=args.source,
                 proxy=args.proxy,
                 cache_dir=args.cache_dir,
-                max_workers=args.max_workers
+                max_workers=args.max_workers,
+                storage=args.storage,
+                reporter=reporter
             )
         else:
             result = download_dataset(
                 config_name=args.config_name,
                 source=args.source,
                 proxy=args.proxy,
-                cache_dir=args.cache_dir
+                cache_dir=args.cache_dir,
+                storage=args.storage,
+                reporter=reporter
             )
         
         # 显示结果
         print(f"\n下载完成!")
         print(f"缓存目录: {result['cache_dir']}")
+        if result.get('pack_path'):
+            print(f"容器文件: {result['pack_path']}")
         print(f"总数据集数: {result['total_datasets']}")
         print(f"成功: {result['success_count']}")
         print(f"失败: {result['failed_count']}")
         
+        metrics = result['metrics']
+        print(f"耗时: {metrics['wall_time']:.2f} 秒, 传输: {metrics['bytes']} 字节 ({metrics['bytes_per_second'] / 1e6:.2f} MB/s)")
+        if metrics['latency']['count']:
+            latency = metrics['latency']
+            print(f"单数据集延迟: p50 {latency['p50']:.2f}s / p95 {latency['p95']:.2f}s / p99 {latency['p99']:.2f}s")
+        
         if result.get('failed'):
             print(f"\n失败的数据集:")
             for dataset in result['failed']:
@@ -0,0 +1,329 @@
+"""
+异步下载接口，供基于 asyncio 的服务直接调用而不阻塞事件循环。
+
+与 utils 中的同步函数共用缓存目录布局、容器存储和结果字典格式。
+需要可选依赖 aiohttp: pip install "sim-datasets[async]"
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from pathlib import Path
+
+from . import utils
+
+# 流式下载时每累计这么多字节才写一次盘
+_WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _import_aiohttp():
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise ImportError('异步下载接口需要 aiohttp，请执行: pip install "sim-datasets[async]"') from e
+    return aiohttp
+
+
+def _create_session(max_connections: int = 5):
+    """创建共享连接池的 aiohttp 会话，超时设置与同步下载保持一致。"""
+    aiohttp = _import_aiohttp()
+    connector = aiohttp.TCPConnector(limit=max_connections)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=60, sock_read=60)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, trust_env=True)
+
+
+def _partition_cache(config_name: str, datasets_list: list, cache_dir: Path, storage: str):
+    """
+    在线程池中执行的缓存查询：创建缓存目录、读取容器索引并判断每个数据集的缓存位置。
+
+    Returns:
+        (容器文件路径或None, {数据集名称: "pack" / "directory" / None})
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    pack_file, packed = utils._open_pack_index(config_name, datasets_list, cache_dir, storage)
+    locations = {}
+    for dataset_name in datasets_list:
+        dataset_dir = cache_dir / Path(dataset_name)
+        if dataset_name in packed:
+            locations[dataset_name] = "pack"
+        elif dataset_dir.is_dir() and any(dataset_dir.iterdir()):
+            locations[dataset_name] = "directory"
+        else:
+            locations[dataset_name] = None
+    return pack_file, locations
+
+
+def _prepare_dataset_dir(dataset_dir: Path, tar_path: Path):
+    """创建数据集目录，返回已缓存压缩包的大小；尚未缓存时返回 None。"""
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        return tar_path.stat().st_size
+    except FileNotFoundError:
+        return None
+
+
+async def _fetch_archive(session, download_url: str, part_path: Path, proxy: str, dataset_name: str, reporter):
+    """
+    请求一次压缩包，状态码为 200 时流式写入 part_path，返回 (HTTP 状态码, 收到的字节数)。
+
+    网络错误以 aiohttp 异常抛出，由调用方决定是否重试；出错或被取消时临时文件已关闭，由调用方删除。
+    """
+    import asyncio
+
+    from .events import BYTES_EVENT_INTERVAL
+
+    loop = asyncio.get_running_loop()
+    async with session.get(download_url, proxy=proxy or None) as response:
+        if response.status != 200:
+            return response.status, 0
+        received = 0
+        pending = 0
+        # 数据先在内存中攒够 _WRITE_BUFFER_SIZE 再交给线程池写盘，避免在事件循环中阻塞
+        buffer = bytearray()
+        f = await loop.run_in_executor(None, open, part_path, 'wb')
+        try:
+            async for chunk in response.content.iter_chunked(65536):
+                buffer += chunk
+                received += len(chunk)
+                pending += len(chunk)
+                if len(buffer) >= _WRITE_BUFFER_SIZE:
+                    await loop.run_in_executor(None, f.write, bytes(buffer))
+                    buffer.clear()
+                if pending >= BYTES_EVENT_INTERVAL:
+                    reporter.emit("bytes_received", dataset_name, bytes=pending, total_bytes=received)
+                    pending = 0
+            if buffer:
+                await loop.run_in_executor(None, f.write, bytes(buffer))
+        except BaseException:
+            # 出错或被取消时同步关闭，调用方随后删除临时文件
+            f.close()
+            raise
+        await loop.run_in_executor(None, f.close)
+        if pending:
+            reporter.emit("bytes_received", dataset_name, bytes=pending, total_bytes=received)
+    return 200, received
+
+
+async def _resolve_source(source, proxy: str, reporter) -> str:
+    import asyncio
+
+    if source is None:
+        # IP 检测使用阻塞的 requests，放到线程池中执行
+        loop = asyncio.get_running_loop()
+        source = await loop.run_in_executor(None, utils.auto_select_source, proxy, reporter)
+    return source.lower()
+
+
+async def adownload_single_dataset(dataset_name: str, source: str = None, proxy="", cache_dir=None, session=None, reporter=None):
+    """
+    异步下载单个数据集的压缩包（默认 package.tar.gz），解压后删除压缩包。
+
+    下载先写入 <压缩包文件名>.part，完成后再原子重命名；任务被取消或出错时删除该临时文件，
+    因此缓存中不会残留半截压缩包。解压在线程池中进行，一旦开始即执行到结束。
+
+    Args:
+        dataset_name: 数据集名称，格式如 "llm-srbench/bio_pop_growth/BPG0"
+        source: 数据源，支持 "modelscope" 或 "huggingface"，如果为None则自动根据IP位置选择
+        proxy: 代理地址，空字符串表示不使用代理
+        cache_dir: 缓存目录，如果为None则使用默认目录
+        session: 共享的 aiohttp.ClientSession，如果为None则为本次调用单独创建
+        reporter: 进度事件分发器，如果为None则使用当前上下文或默认的打印输出
+
+    Returns:
+        下载的数据集内容字典，格式与 download_single_dataset 相同
+    """
+    import asyncio
+
+    from .events import get_reporter
+
+    reporter = get_reporter(reporter)
+    utils._check_decompress_backend()
+    source = await _resolve_source(source, proxy, reporter)
+    loop = asyncio.get_running_loop()
+
+    tar_filename = utils._package_filename()
+    download_url = f"{utils._build_dataset_base_url(dataset_name, source)}/{tar_filename}"
+
+    reporter.info(f"从 {source} 下载 {dataset_name} 的 {tar_filename} ...")
+
+    dataset_data = {
+        'dataset_name': dataset_name,
+        'source': source,
+        'files': {},
+        'total_size': 0,
+        'cache_path': None,
+        'success': False,
+    }
+
+    cache_dir = utils._resolve_cache_dir(cache_dir)
+    dataset_dir = cache_dir / Path(dataset_name)
+    dataset_data['cache_path'] = str(dataset_dir)
+
+    tar_path = dataset_dir / tar_filename
+    part_path = dataset_dir / (tar_filename + '.part')
+
+    reporter.emit("start", dataset_name, url=download_url, source=source)
+    cached_size = await loop.run_in_executor(None, _prepare_dataset_dir, dataset_dir, tar_path)
+    if cached_size is not None:
+        reporter.emit("cache_hit", dataset_name, message=f"{tar_filename} 已缓存", location="archive")
+        dataset_data['files'][tar_filename] = {
+            'path': str(tar_path),
+            'size': cached_size,
+            'url': download_url,
+        }
+    else:
+        aiohttp = _import_aiohttp()
+        own_session = session is None
+        if own_session:
+            session = _create_session()
+        try:
+            reporter.info(f"  下载 {tar_filename} ...")
+            for attempt in range(1, utils._MAX_ATTEMPTS + 1):
+                try:
+                    status, received = await _fetch_archive(session, download_url, part_path, proxy, dataset_name, reporter)
+                    if status == 200:
+                        await loop.run_in_executor(None, part_path.replace, tar_path)
+                    error = None if status == 200 else f"HTTP {status}"
+                    retryable = status in utils._RETRY_STATUS
+                except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                    error, retryable = str(e) or type(e).__name__, True
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    error, retryable = str(e), False
+                if error is None or not retryable or attempt == utils._MAX_ATTEMPTS:
+                    break
+                await asyncio.sleep(utils._emit_retry(reporter, dataset_name, tar_filename, attempt, error))
+        except asyncio.CancelledError:
+            part_path.unlink(missing_ok=True)
+            raise
+        finally:
+            if own_session:
+                await session.close()
+
+        if error is not None:
+            part_path.unlink(missing_ok=True)
+            reporter.info(f"  下载 {tar_filename} 失败: {error}")
+            return utils._build_failure_result(dataset_data, tar_filename, download_url, error, reporter)
+
+        if not await loop.run_in_executor(None, utils._is_valid_package, tar_path):
+            await loop.run_in_executor(None, tar_path.unlink)
+            error_msg = "下载的文件不是有效的 gzip/zstd 压缩包，可能是404错误页面"
+            reporter.info(f"  ❌ {error_msg}")
+            return utils._build_failure_result(dataset_data, tar_filename, download_url, error_msg, reporter)
+
+        file_size = received
+        dataset_data['files'][tar_filename] = {
+            'path': str(tar_path),
+            'size': file_size,
+            'url': download_url,
+        }
+        dataset_data['total_size'] += file_size
+        reporter.info(f"  ✅ {tar_filename} 已保存到 {tar_path} (已验证格式)")
+
+    return await loop.run_in_executor(None, utils._extract_package, tar_path, dataset_dir, dataset_data, reporter)
+
+
+async def adownload_dataset(config_name: str, source: str = None, proxy="", cache_dir=None, max_concurrency: int = 5, storage: str = "files", reporter=None):
+    """
+    异步并发下载指定的数据集，所有请求共用一个连接池。
+
+    Args:
+        config_name: 数据集名称
+        source: 数据源，支持 "modelscope" 或 "huggingface"，如果为None则自动根据IP位置选择
+        proxy: 代理地址，空字符串表示不使用代理
+        cache_dir: 缓存目录，如果为None则使用默认目录
+        max_concurrency: 最大并发下载数，同时也是连接池大小，默认为5
+        storage: 存储后端，"files" 保留解压后的目录，"pack" 将整个配置打包为单个容器文件
+        reporter: 进度事件分发器（ProgressReporter），可注册回调、写 JSON-lines 日志或静默输出
+
+    Returns:
+        下载结果，格式与 download_dataset 相同
+    """
+    import asyncio
+
+    from .events import MetricsAggregator, get_reporter
+
+    metrics = MetricsAggregator()
+    reporter = get_reporter(reporter)
+    # metrics 只在本次调用期间挂在调用方的 reporter 上，保留其子类行为
+    with reporter.attached(metrics):
+        loop = asyncio.get_running_loop()
+
+        datasets_list = utils.get_datasets_list(config_name)
+
+        cache_dir = utils._resolve_cache_dir(cache_dir)
+        pack_file, locations = await loop.run_in_executor(
+            None, _partition_cache, config_name, datasets_list, cache_dir, storage
+        )
+
+        results = {}
+        pending_datasets = []
+        # 下载前就已存在的目录缓存可能被其他配置共享，打包时保留其目录
+        directory_hits = []
+        for dataset_name in datasets_list:
+            location = locations[dataset_name]
+            if location == "pack":
+                reporter.emit("cache_hit", dataset_name, message=f"数据集 {dataset_name} 已在容器中缓存，跳过下载", location="pack")
+                results[dataset_name] = None
+            elif location == "directory":
+                reporter.emit("cache_hit", dataset_name, message=f"数据集 {dataset_name} 已缓存，跳过下载", location="directory")
+                results[dataset_name] = None
+                directory_hits.append(dataset_name)
+            else:
+                pending_datasets.append(dataset_name)
+
+        # 仅在有数据集需要下载时才自动选择数据源；全部命中缓存时不做任何网络探测
+        if pending_datasets:
+            utils._check_decompress_backend()
+            source = await _resolve_source(source, proxy, reporter)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(dataset_name, session):
+            async with semaphore:
+                try:
+                    result = await adownload_single_dataset(
+                        dataset_name, source=source, proxy=proxy, cache_dir=cache_dir, session=session, reporter=reporter
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    reporter.emit("failure", dataset_name, message=f"数据集 {dataset_name} 下载失败: {e}", error=str(e))
+                    return dataset_name, str(e)
+
+            if result.get("success"):
+                reporter.info(f"数据集 {dataset_name} 下载完成并保存到 {result['cache_path']}")
+                return dataset_name, None
+            error = utils._result_error(result)
+            reporter.info(f"数据集 {dataset_name} 下载失败: {error}")
+            return dataset_name, error
+
+        if pending_datasets:
+            async with _create_session(max_connections=max_concurrency) as session:
+                fetched = await asyncio.gather(*(fetch(name, session) for name in pending_datasets))
+            results.update(fetched)
+
+        downloaded_datasets = [name for name in datasets_list if results[name] is None]
+        failed_datasets = [name for name in datasets_list if results[name] is not None]
+
+        if pack_file is not None:
+            from .storage import pack_datasets
+
+            packed_now = await loop.run_in_executor(
+                None, partial(pack_datasets, downloaded_datasets, pack_file, cache_dir, keep_sources=directory_hits)
+            )
+            reporter.info(f"已将 {len(packed_now)} 个数据集写入容器 {pack_file}")
+
+        return {
+            "config_name": config_name,
+            "cache_dir": str(cache_dir),
+            "total_datasets": len(datasets_list),
+            "downloaded": downloaded_datasets,
+            "failed": failed_datasets,
+            "success_count": len(downloaded_datasets),
+            "failed_count": len(failed_datasets),
+            "storage": storage,
+            "pack_path": str(pack_file) if pack_file is not None else None,
+            "metrics": metrics.summary(),
+        }
@@ -0,0 +1,176 @@
+"""
+数据集压缩包的解压后端。
+
+gzip 压缩包按以下顺序自动选择可用的实现:
+    pigz      外部命令，多线程读写与校验，解压不受 GIL 限制
+    igzip     外部命令（Intel ISA-L）
+    isal      Python 绑定 python-isal（可选依赖）
+    zlib-ng   Python 绑定 zlib-ng（可选依赖）
+    stdlib    Python 标准库 gzip，单线程
+
+zstd 压缩包（package.tar.zst）使用 zstandard Python 绑定或 zstd 外部命令。
+
+外部命令后端在独立进程中解压，多个数据集同时解压时可以占满多个核心；小于
+SUBPROCESS_MIN_SIZE 的压缩包启动子进程得不偿失，自动选择时只使用进程内后端。
+可以通过环境变量 SIM_DATASETS_DECOMPRESS_BACKEND 强制指定后端。
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+GZIP_BACKENDS = ("pigz", "igzip", "isal", "zlib-ng", "stdlib")
+ZSTD_BACKENDS = ("zstandard", "zstd")
+
+# 自动选择时，小于该大小的压缩包不使用外部命令后端
+SUBPROCESS_MIN_SIZE = 8 << 20
+
+_COMMAND_BACKENDS = {"pigz", "igzip", "zstd"}
+_MODULE_BACKENDS = {"isal": "isal.igzip", "zlib-ng": "zlib_ng.gzip_ng", "zstandard": "zstandard"}
+
+
+def detect_format(path) -> Optional[str]:
+    """根据文件头判断压缩格式，返回 "gzip"、"zstd"，无法识别时返回 None。"""
+    with open(path, "rb") as f:
+        head = f.read(4)
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head == ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+
+@lru_cache(maxsize=None)
+def backend_available(name: str) -> bool:
+    """判断解压后端在当前环境中是否可用，结果在进程内缓存。"""
+    import importlib.util
+    import shutil
+
+    if name == "stdlib":
+        return True
+    if name in _COMMAND_BACKENDS:
+        return shutil.which(name) is not None
+    if name in _MODULE_BACKENDS:
+        module = _MODULE_BACKENDS[name]
+        try:
+            return importlib.util.find_spec(module.split(".")[0]) is not None
+        except ValueError:
+            return False
+    raise ValueError(f"未知的解压后端: {name}")
+
+
+def select_backend(fmt: str, backend: Optional[str] = None, size: Optional[int] = None) -> str:
+    """
+    为压缩格式选择解压后端。
+
+    Args:
+        fmt: "gzip" 或 "zstd"
+        backend: 指定的后端名称；为None时读取 SIM_DATASETS_DECOMPRESS_BACKEND，仍为空则自动选择
+        size: 压缩包大小（字节）；自动选择时小于 SUBPROCESS_MIN_SIZE 则优先使用进程内后端
+
+    Raises:
+        ValueError: 当指定的后端不支持该格式或不可用，或 zstd 没有任何可用后端时
+    """
+    import os
+
+    candidates = GZIP_BACKENDS if fmt == "gzip" else ZSTD_BACKENDS
+    if backend is None:
+        backend = os.environ.get("SIM_DATASETS_DECOMPRESS_BACKEND", "").strip() or None
+
+    if backend is not None and backend != "auto":
+        if backend not in candidates:
+            raise ValueError(f"解压后端 {backend} 不支持 {fmt} 格式，可选: {', '.join(candidates)}")
+        if not backend_available(backend):
+            raise ValueError(f"解压后端 {backend} 在当前环境中不可用")
+        return backend
+
+    if size is not None and size < SUBPROCESS_MIN_SIZE:
+        # 进程内后端排在前面，没有可用的进程内后端时（如只有 zstd 命令）仍回退到外部命令
+        candidates = sorted(candidates, key=lambda name: name in _COMMAND_BACKENDS)
+    for name in candidates:
+        if backend_available(name):
+            return name
+    raise ValueError('没有可用的 zstd 解压后端，请安装 zstandard (pip install zstandard) 或 zstd 命令')
+
+
+def _extract_with_command(command: list, archive_path: Path, dest_dir: Path) -> None:
+    import subprocess
+    import tarfile
+
+    with subprocess.Popen(
+        command + [str(archive_path)], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    ) as proc:
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+                tar.extractall(path=dest_dir)
+        finally:
+            proc.stdout.close()
+            stderr = proc.stderr.read()
+            returncode = proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"{command[0]} 解压失败 (退出码 {returncode}): {stderr.decode(errors='replace').strip()}")
+
+
+def _extract_with_fileobj(fileobj, dest_dir: Path) -> None:
+    import tarfile
+
+    with tarfile.open(fileobj=fileobj, mode="r|") as tar:
+        tar.extractall(path=dest_dir)
+
+
+def extract_archive(archive_path, dest_dir, backend: Optional[str] = None) -> str:
+    """
+    将 tar.gz / tar.zst 压缩包解压到 dest_dir。
+
+    Args:
+        archive_path: 压缩包路径
+        dest_dir: 解压目标目录
+        backend: 指定解压后端，为None时自动选择
+
+    Returns:
+        实际使用的后端名称
+
+    Raises:
+        ValueError: 当文件不是 gzip / zstd 格式或没有可用后端时
+    """
+    archive_path = Path(archive_path)
+    dest_dir = Path(dest_dir)
+
+    fmt = detect_format(archive_path)
+    if fmt is None:
+        raise ValueError(f"{archive_path} 不是 gzip 或 zstd 压缩文件")
+    name = select_backend(fmt, backend, size=archive_path.stat().st_size)
+
+    if name == "pigz":
+        # pigz 解压本身是单线程的，但读、写和 CRC 校验分别在独立线程中进行
+        _extract_with_command(["pigz", "-dc"], archive_path, dest_dir)
+    elif name == "igzip":
+        _extract_with_command(["igzip", "-dc"], archive_path, dest_dir)
+    elif name == "zstd":
+        _extract_with_command(["zstd", "-dcq"], archive_path, dest_dir)
+    elif name == "isal":
+        from isal import igzip
+
+        with igzip.open(archive_path, "rb") as f:
+            _extract_with_fileobj(f, dest_dir)
+    elif name == "zlib-ng":
+        from zlib_ng import gzip_ng
+
+        with gzip_ng.open(archive_path, "rb") as f:
+            _extract_with_fileobj(f, dest_dir)
+    elif name == "zstandard":
+        import zstandard
+
+        with open(archive_path, "rb") as raw, zstandard.ZstdDecompressor().stream_reader(raw) as f:
+            _extract_with_fileobj(f, dest_dir)
+    else:
+        import gzip
+
+        with gzip.open(archive_path, "rb") as f:
+            _extract_with_fileobj(f, dest_dir)
+    return name
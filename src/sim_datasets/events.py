@@ -0,0 +1,230 @@
+"""
+结构化进度事件与指标统计。
+
+下载过程中的每个状态变化都会作为一个事件字典发出，例如:
+    {"event": "bytes_received", "timestamp": 1760000000.0, "dataset_name": "nguyen/Nguyen-1",
+     "bytes": 1048576, "total_bytes": 2097152}
+
+事件类型:
+    start           开始下载某个数据集
+    bytes_received  收到数据（按约 1 MiB 聚合后发出，下载结束时补发剩余部分）
+    extract_start   开始解压
+    extract_finish  解压完成
+    cache_hit       数据集已在缓存目录或容器中
+    retry           连接错误、超时或 5xx 响应后退避重试
+    failure         下载、校验或解压失败
+    finish          数据集下载并解压成功
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+from typing import Callable, Dict, List, Optional
+
+EVENT_TYPES = (
+    "start",
+    "bytes_received",
+    "extract_start",
+    "extract_finish",
+    "cache_hit",
+    "retry",
+    "failure",
+    "finish",
+)
+
+# bytes_received 事件的聚合粒度
+BYTES_EVENT_INTERVAL = 1 << 20
+
+# 当前生效的 reporter，批量下载函数借此把 reporter 传给内部调用的单数据集下载
+_current_reporter: contextvars.ContextVar = contextvars.ContextVar("sim_datasets_reporter", default=None)
+
+
+class ProgressReporter:
+    """
+    进度事件分发器：向回调函数转发事件、可选写入 JSON-lines 日志，并负责控制台输出。
+
+    Args:
+        callbacks: 回调函数列表，每个回调接收一个事件字典
+        quiet: 为 True 时不向控制台打印任何状态信息
+        log_path: JSON-lines 事件日志路径，为 None 时不写日志
+    """
+
+    def __init__(self, callbacks: Optional[List[Callable[[dict], None]]] = None, quiet: bool = False, log_path=None):
+        import threading
+        from pathlib import Path
+
+        self.callbacks = list(callbacks or [])
+        self.quiet = quiet
+        self.log_path = Path(log_path) if log_path else None
+        # 异步接口会在线程池中解压，事件可能来自多个线程
+        self._lock = threading.RLock()
+
+    def add_callback(self, callback: Callable[[dict], None]) -> None:
+        with self._lock:
+            self.callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[dict], None]) -> None:
+        with self._lock:
+            self.callbacks.remove(callback)
+
+    @contextlib.contextmanager
+    def attached(self, callback: Callable[[dict], None]):
+        """
+        在 with 块内临时向本 reporter 添加 callback，退出时移除。
+
+        直接修改调用方的 reporter 而不是复制一份，子类重写的方法因此继续生效；
+        同一个 reporter 被多个并发下载共享时，callback 会收到所有下载的事件。
+        """
+        self.add_callback(callback)
+        try:
+            yield self
+        finally:
+            self.remove_callback(callback)
+
+    def info(self, message: str) -> None:
+        """输出不对应任何事件的状态信息。"""
+        if not self.quiet:
+            print(message)
+
+    def emit(self, event: str, dataset_name: Optional[str] = None, message: Optional[str] = None, **fields) -> dict:
+        """
+        发出一个事件。
+
+        Args:
+            event: 事件类型，见 EVENT_TYPES
+            dataset_name: 事件对应的数据集名称
+            message: 控制台输出文本，quiet 模式下忽略
+            **fields: 事件附带的其他字段
+
+        Returns:
+            事件字典
+        """
+        import time
+
+        if event not in EVENT_TYPES:
+            raise ValueError(f"未知的事件类型: {event}")
+        record = {"event": event, "timestamp": time.time(), "dataset_name": dataset_name}
+        record.update(fields)
+        if message and not self.quiet:
+            print(message)
+        self.dispatch(record)
+        return record
+
+    def dispatch(self, record: dict) -> None:
+        """将已有事件转发给回调和日志，不打印。多进程下载用它回放子进程中的事件。"""
+        import json
+
+        with self._lock:
+            for callback in self.callbacks:
+                callback(record)
+            if self.log_path is not None:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def get_reporter(reporter: Optional[ProgressReporter] = None) -> ProgressReporter:
+    """返回显式传入的 reporter；否则返回当前上下文中的 reporter，都没有时创建默认的打印 reporter。"""
+    if reporter is not None:
+        return reporter
+    current = _current_reporter.get()
+    if current is not None:
+        return current
+    return ProgressReporter()
+
+
+@contextlib.contextmanager
+def use_reporter(reporter: ProgressReporter):
+    """在 with 代码块内将 reporter 设为当前上下文的 reporter。"""
+    token = _current_reporter.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _current_reporter.reset(token)
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """最近秩法计算分位数，sorted_values 需已排序。"""
+    import math
+
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class MetricsAggregator:
+    """
+    事件统计器，作为回调注册到 ProgressReporter 上。
+
+    summary() 返回吞吐量、各阶段耗时以及每个数据集端到端延迟的 p50/p95/p99。
+    """
+
+    def __init__(self):
+        self._first_ts: Optional[float] = None
+        self._last_ts: Optional[float] = None
+        self._started: Dict[str, float] = {}
+        self._extract_started: Dict[str, float] = {}
+        self._latencies: List[float] = []
+        self._stages = {"download": 0.0, "extract": 0.0}
+        self._bytes = 0
+        self._counts = {"finish": 0, "failure": 0, "cache_hit": 0, "retry": 0}
+        self._backends: Dict[str, int] = {}
+
+    def __call__(self, record: dict) -> None:
+        event = record["event"]
+        ts = record["timestamp"]
+        name = record.get("dataset_name")
+
+        if self._first_ts is None or ts < self._first_ts:
+            self._first_ts = ts
+        if self._last_ts is None or ts > self._last_ts:
+            self._last_ts = ts
+
+        if event in self._counts:
+            self._counts[event] += 1
+
+        if event == "start":
+            self._started[name] = ts
+        elif event == "bytes_received":
+            self._bytes += record.get("bytes", 0)
+        elif event == "extract_start":
+            self._extract_started[name] = ts
+            if name in self._started:
+                self._stages["download"] += ts - self._started[name]
+        elif event == "extract_finish":
+            backend = record.get("backend")
+            if backend:
+                self._backends[backend] = self._backends.get(backend, 0) + 1
+            if name in self._extract_started:
+                self._stages["extract"] += ts - self._extract_started.pop(name)
+        elif event in ("finish", "failure"):
+            started = self._started.pop(name, None)
+            if started is not None:
+                self._latencies.append(ts - started)
+            if event == "failure" and name in self._extract_started:
+                self._stages["extract"] += ts - self._extract_started.pop(name)
+
+    def summary(self) -> dict:
+        """返回统计结果字典（时间单位为秒）。"""
+        wall_time = 0.0
+        if self._first_ts is not None:
+            wall_time = self._last_ts - self._first_ts
+        latencies = sorted(self._latencies)
+        return {
+            "wall_time": wall_time,
+            "bytes": self._bytes,
+            "bytes_per_second": self._bytes / wall_time if wall_time > 0 else 0.0,
+            "stages": dict(self._stages),
+            "latency": {
+                "count": len(latencies),
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+            },
+            "finished": self._counts["finish"],
+            "failures": self._counts["failure"],
+            "cache_hits": self._counts["cache_hit"],
+            "retries": self._counts["retry"],
+            "decompress_backends": dict(self._backends),
+        }
@@ -0,0 +1,351 @@
+"""
+离线缓存导出 / 导入，用于无法联网的计算集群。
+
+导出: 将某个配置在缓存目录中的全部内容（解压后的数据集目录以及 pack 容器文件）连同清单
+      一起写入单个顺序 tar 包，清单位于第一个成员，记录每个文件的大小和 sha256。
+导入: 顺序读取 tar 包，把文件写入与校验分发给线程池并行执行，先写到 cache_dir 下的临时目录，
+      每个数据集（或容器文件）的全部文件校验通过后才整体移入 cache_dir，出错的数据集不会留下
+      残缺目录。导入后对同一配置调用 download_dataset 全部命中缓存，不会发起任何网络请求。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+MANIFEST_NAME = "sim_datasets_manifest.json"
+MANIFEST_FORMAT = 1
+
+# 超过该大小的成员在主线程中流式写入，避免整个读入内存
+_STREAM_THRESHOLD = 16 << 20
+# 已读入内存、等待线程池写入的成员总字节数上限
+_MAX_IN_FLIGHT_BYTES = 256 << 20
+
+
+def _sha256_file(path: Path) -> str:
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _collect_files(config_name: str, cache_dir: Path):
+    """返回 (数据集列表, 已缓存的数据集, 未缓存的数据集, 需要导出的文件列表, 容器文件路径或None)。"""
+    from .registry import is_pattern
+    from .storage import DatasetPack, pack_path
+    from .utils import get_datasets_list
+
+    datasets = get_datasets_list(config_name)
+
+    pack_file = None
+    packed = set()
+    if not is_pattern(config_name):
+        candidate = pack_path(config_name, cache_dir)
+        if candidate.exists():
+            pack_file = candidate
+            with DatasetPack(pack_file) as pack:
+                packed = set(pack.datasets(datasets))
+
+    files: List[Path] = []
+    cached, missing = [], []
+    for dataset_name in datasets:
+        if dataset_name in packed:
+            cached.append(dataset_name)
+            continue
+        dataset_dir = cache_dir / Path(dataset_name)
+        dataset_files = sorted(
+            p for p in dataset_dir.rglob("*") if p.is_file() and not p.name.endswith(".part")
+        ) if dataset_dir.is_dir() else []
+        if dataset_files:
+            cached.append(dataset_name)
+            files.extend(dataset_files)
+        else:
+            missing.append(dataset_name)
+
+    if pack_file is not None:
+        files.append(pack_file)
+    return datasets, cached, missing, files, pack_file
+
+
+def export_cache(config_name: str, output_path, cache_dir=None, reporter=None) -> dict:
+    """
+    将配置的缓存内容导出为单个 tar 包。
+
+    Args:
+        config_name: 数据集配置名称
+        output_path: 输出 tar 文件路径（以 .gz 结尾时使用 gzip 压缩，否则不压缩）
+        cache_dir: 缓存目录，如果为None则使用默认目录
+        reporter: 进度事件分发器，如果为None则使用默认的打印输出
+
+    Returns:
+        导出结果字典
+    """
+    import io
+    import json
+    import tarfile
+
+    from .events import get_reporter
+    from .utils import _resolve_cache_dir
+
+    reporter = get_reporter(reporter)
+    cache_dir = _resolve_cache_dir(cache_dir)
+    output_path = Path(output_path)
+
+    datasets, cached, missing, files, pack_file = _collect_files(config_name, cache_dir)
+    if missing:
+        reporter.info(f"警告: {len(missing)} 个数据集未缓存，不会包含在导出文件中")
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "config_name": config_name,
+        # 导出时缓存中有容器文件则为 "pack"，导入后用 storage="pack" 下载可继续增量写入该容器
+        "storage": "pack" if pack_file is not None else "files",
+        "datasets": cached,
+        "missing": missing,
+        "files": {},
+    }
+    total_size = 0
+    for path in files:
+        size = path.stat().st_size
+        manifest["files"][path.relative_to(cache_dir).as_posix()] = {
+            "size": size,
+            "sha256": _sha256_file(path),
+        }
+        total_size += size
+
+    mode = "w:gz" if output_path.suffix == ".gz" else "w"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with tarfile.open(output_path, mode) as tar:
+        data = json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8")
+        info = tarfile.TarInfo(MANIFEST_NAME)
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+        for path in files:
+            tar.add(path, arcname=path.relative_to(cache_dir).as_posix(), recursive=False)
+
+    reporter.info(f"已导出 {len(cached)} 个数据集（{len(files)} 个文件，{total_size} 字节）到 {output_path}")
+    return {
+        "config_name": config_name,
+        "output_path": str(output_path),
+        "total_datasets": len(datasets),
+        "exported": cached,
+        "missing": missing,
+        "storage": manifest["storage"],
+        "file_count": len(files),
+        "total_size": total_size,
+    }
+
+
+def _safe_destination(cache_dir: Path, name: str) -> Path:
+    """拒绝绝对路径和 '..'，防止导入时写出 cache_dir 之外。"""
+    from pathlib import PurePosixPath
+
+    member = PurePosixPath(name)
+    if member.is_absolute() or ".." in member.parts:
+        raise ValueError(f"导入文件包含非法路径: {name}")
+    return cache_dir.joinpath(*member.parts)
+
+
+class _ByteBudget:
+    """限制同时驻留在内存中的字节数；单个超过上限的请求在预算空闲时放行。"""
+
+    def __init__(self, limit: int):
+        import threading
+
+        self.limit = limit
+        self.used = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, size: int) -> None:
+        with self._cond:
+            while self.used and self.used + size > self.limit:
+                self._cond.wait()
+            self.used += size
+
+    def release(self, size: int) -> None:
+        with self._cond:
+            self.used -= size
+            self._cond.notify_all()
+
+
+def _unit_of(name: str, datasets: Set[str]) -> str:
+    """返回文件所属的恢复单元：所在的数据集名称，不属于任何数据集时（容器文件）为文件本身。"""
+    parts = name.split("/")
+    for end in range(len(parts) - 1, 0, -1):
+        prefix = "/".join(parts[:end])
+        if prefix in datasets:
+            return prefix
+    return name
+
+
+def _write_member(dest: Path, data: bytes, expected: Optional[dict]) -> Optional[str]:
+    """写入单个文件并校验，返回错误信息，成功时返回 None。"""
+    import hashlib
+
+    if expected is not None and hashlib.sha256(data).hexdigest() != expected["sha256"]:
+        return "sha256 校验失败"
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with open(dest, "wb") as f:
+        f.write(data)
+    return None
+
+
+def _stream_member(tar, member, dest: Path, expected: Optional[dict]) -> Optional[str]:
+    """大文件在主线程中边读边写边计算 sha256。"""
+    import hashlib
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    src = tar.extractfile(member)
+    with open(dest, "wb") as f:
+        for block in iter(lambda: src.read(1 << 20), b""):
+            digest.update(block)
+            f.write(block)
+    if expected is not None and digest.hexdigest() != expected["sha256"]:
+        return "sha256 校验失败"
+    return None
+
+
+def _commit_unit(staging: Path, cache_dir: Path, unit: str) -> None:
+    """将临时目录中校验通过的数据集目录或容器文件移入 cache_dir，替换已有内容。"""
+    import os
+    import shutil
+
+    src = staging.joinpath(*unit.split("/"))
+    dest = cache_dir.joinpath(*unit.split("/"))
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.is_dir() and src.is_dir():
+        shutil.rmtree(dest)
+    os.replace(src, dest)
+
+
+def import_cache(archive_path, cache_dir=None, max_workers: Optional[int] = None, verify: bool = True, reporter=None) -> dict:
+    """
+    从 export_cache 生成的 tar 包恢复缓存。
+
+    文件先写入 cache_dir 下的临时目录；一个数据集的全部文件都读取并校验通过后，才把整个数据集
+    目录移入 cache_dir（替换已有目录）。任一文件出错的数据集会被整体丢弃，下次下载时重新获取。
+
+    Args:
+        archive_path: 导出的 tar 文件路径
+        cache_dir: 目标缓存目录，如果为None则使用默认目录
+        max_workers: 并行写入线程数，默认为 min(32, CPU 数 + 4)
+        verify: 是否按清单校验每个文件的 sha256
+        reporter: 进度事件分发器，如果为None则使用默认的打印输出
+
+    Returns:
+        导入结果字典，"datasets" 为成功恢复的数据集，"failed_datasets" 为被丢弃的数据集，
+        "storage" 为导出时的存储后端
+
+    Raises:
+        ValueError: 当文件不是有效的导出包或包含非法路径时
+    """
+    import json
+    import os
+    import shutil
+    import tarfile
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .events import get_reporter
+    from .utils import _resolve_cache_dir
+
+    reporter = get_reporter(reporter)
+    cache_dir = _resolve_cache_dir(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) + 4)
+
+    errors: List[str] = []
+    # 恢复单元 -> 该单元中出错的文件
+    unit_errors: Dict[str, List[str]] = {}
+    written: Dict[str, int] = {}
+    staging = Path(tempfile.mkdtemp(prefix=".sim_datasets_import-", dir=cache_dir))
+    try:
+        with tarfile.open(archive_path, "r:*") as tar, ThreadPoolExecutor(max_workers=max_workers) as pool:
+            first = tar.next()
+            if first is None or first.name != MANIFEST_NAME:
+                raise ValueError(f"{archive_path} 不是有效的 sim-datasets 导出文件")
+            manifest = json.loads(tar.extractfile(first).read().decode("utf-8"))
+            expected_files: Dict[str, dict] = manifest.get("files", {})
+            datasets = set(manifest.get("datasets", []))
+
+            # 限制已读入内存、等待写入的总字节数
+            budget = _ByteBudget(_MAX_IN_FLIGHT_BYTES)
+            futures = []
+
+            def submit(name, dest, data, expected):
+                budget.acquire(len(data))
+                future = pool.submit(_write_member, dest, data, expected)
+                future.add_done_callback(lambda _, size=len(data): budget.release(size))
+                futures.append((name, future))
+
+            def record(name, error):
+                unit = _unit_of(name, datasets)
+                if error:
+                    errors.append(f"{name}: {error}")
+                    unit_errors.setdefault(unit, []).append(name)
+                else:
+                    written[unit] = written.get(unit, 0) + 1
+
+            for member in tar:
+                if not member.isfile() or member.name == MANIFEST_NAME:
+                    continue
+                dest = _safe_destination(staging, member.name)
+                expected = expected_files.get(member.name)
+                if expected is None:
+                    errors.append(f"{member.name}: 不在清单中")
+                    continue
+                if not verify:
+                    expected = None
+                if member.size > _STREAM_THRESHOLD:
+                    record(member.name, _stream_member(tar, member, dest, expected))
+                else:
+                    submit(member.name, dest, tar.extractfile(member).read(), expected)
+
+            for name, future in futures:
+                record(name, future.result())
+
+        # 清单中记录但导出包里缺失的文件同样使所属单元作废
+        expected_per_unit: Dict[str, int] = {}
+        for name in expected_files:
+            unit = _unit_of(name, datasets)
+            expected_per_unit[unit] = expected_per_unit.get(unit, 0) + 1
+        for unit, count in expected_per_unit.items():
+            missing = count - written.get(unit, 0) - len(unit_errors.get(unit, []))
+            if missing > 0:
+                errors.append(f"{unit}: 导出文件不完整，缺少 {missing} 个文件")
+                unit_errors.setdefault(unit, [])
+
+        restored_units = [unit for unit in expected_per_unit if unit not in unit_errors]
+        for unit in restored_units:
+            _commit_unit(staging, cache_dir, unit)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    restored = sum(written[unit] for unit in restored_units)
+    # 没有独立目录的数据集保存在容器文件中，随容器文件一起恢复或作废
+    pack_ok = not any(unit not in datasets for unit in unit_errors)
+    restored_datasets = [
+        name for name in manifest.get("datasets", [])
+        if name in restored_units or (name not in expected_per_unit and pack_ok)
+    ]
+    failed_datasets = [name for name in manifest.get("datasets", []) if name not in restored_datasets]
+
+    reporter.info(f"已导入 {len(restored_datasets)} 个数据集（{restored} 个文件）到 {cache_dir}")
+    for error in errors:
+        reporter.info(f"  ❌ {error}")
+
+    return {
+        "config_name": manifest.get("config_name"),
+        "cache_dir": str(cache_dir),
+        "storage": manifest.get("storage", "files"),
+        "datasets": restored_datasets,
+        "failed_datasets": failed_datasets,
+        "restored_files": restored,
+        "errors": errors,
+        "success": not errors,
+    }
@@ -0,0 +1,174 @@
+"""
+下载计划（dry-run）：在不下载任何数据的情况下估算一次下载的规模。
+
+将配置中的数据集与缓存目录比对，对尚未缓存的数据集并发发送 HEAD 请求获取压缩包大小，
+再用一次采样下载测得数据源吞吐量，估算总传输量、预计耗时以及剩余空间是否放得下压缩包。
+配置已全部缓存时不发起任何网络请求。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+# 吞吐量采样最多读取的字节数
+_SAMPLE_BYTES = 1 << 20
+
+
+def _free_disk_bytes(path: Path) -> int:
+    """返回 path 所在文件系统的剩余空间；path 尚不存在时使用最近的已存在上级目录。"""
+    import shutil
+
+    path = path.resolve()
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    return shutil.disk_usage(path).free
+
+
+def _partition_cached(config_name: str, datasets_list: list, cache_dir: Path, storage: str):
+    """按 download_dataset 的缓存规则把数据集分为 (已缓存, 待下载) 两组。"""
+    from .utils import _open_pack_index
+
+    _, packed = _open_pack_index(config_name, datasets_list, cache_dir, storage)
+    cached, pending = [], []
+    for dataset_name in datasets_list:
+        dataset_dir = cache_dir / Path(dataset_name)
+        if dataset_name in packed or (dataset_dir.is_dir() and any(dataset_dir.iterdir())):
+            cached.append(dataset_name)
+        else:
+            pending.append(dataset_name)
+    return cached, pending
+
+
+def _head_size(session, url: str, timeout: float):
+    """HEAD 请求压缩包，返回 (字节数或None, 错误信息或None)。"""
+    try:
+        response = session.head(url, allow_redirects=True, timeout=timeout)
+    except Exception as e:
+        return None, str(e)
+    if response.status_code != 200:
+        return None, f"HTTP {response.status_code}"
+    length = response.headers.get("Content-Length")
+    return (int(length), None) if length and length.isdigit() else (None, None)
+
+
+def _measure_throughput(session, url: str, timeout: float) -> Optional[float]:
+    """下载 url 的前 _SAMPLE_BYTES 字节，返回单连接吞吐量（字节/秒）。"""
+    import time
+
+    try:
+        start = time.perf_counter()
+        with session.get(url, stream=True, timeout=timeout, headers={"Range": f"bytes=0-{_SAMPLE_BYTES - 1}"}) as response:
+            if response.status_code not in (200, 206):
+                return None
+            received = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                received += len(chunk)
+                if received >= _SAMPLE_BYTES:
+                    break
+        elapsed = time.perf_counter() - start
+    except Exception:
+        return None
+    return received / elapsed if received and elapsed > 0 else None
+
+
+def plan_download(
+    config_name: str,
+    source: str = None,
+    proxy="",
+    cache_dir=None,
+    storage: str = "files",
+    max_workers: int = 16,
+    timeout: float = 10,
+    reporter=None,
+) -> dict:
+    """
+    生成下载计划，不下载、不写入任何数据。
+
+    Args:
+        config_name: 数据集配置名称
+        source: 数据源，支持 "modelscope" 或 "huggingface"，如果为None则在需要时自动根据IP位置选择
+        proxy: 代理地址，空字符串表示不使用代理
+        cache_dir: 缓存目录，如果为None则使用默认目录
+        storage: 存储后端，与 download_dataset 相同，用于判断容器文件中已有的数据集
+        max_workers: 并发 HEAD 请求数
+        timeout: 单个请求的超时时间，秒
+        reporter: 进度事件分发器，仅用于数据源自动选择时的提示
+
+    Returns:
+        计划字典，estimated_seconds 按单连接实测吞吐量计算，是并发下载耗时的保守上限；
+        archives_fit_on_disk 只比较压缩包总大小与剩余空间，不包含解压后的数据，
+        实际需要的空间约为压缩包大小加上解压后的大小
+    """
+    import time
+
+    from .events import get_reporter
+    from .utils import _build_dataset_base_url, _package_filename, _resolve_cache_dir, auto_select_source, get_datasets_list
+
+    start = time.perf_counter()
+    cache_dir = _resolve_cache_dir(cache_dir)
+    datasets_list = get_datasets_list(config_name)
+    cached, pending = _partition_cached(config_name, datasets_list, cache_dir, storage)
+
+    plan = {
+        "config_name": config_name,
+        "cache_dir": str(cache_dir),
+        "storage": storage,
+        "source": source,
+        "total_datasets": len(datasets_list),
+        "cached": cached,
+        "to_fetch": pending,
+        "fetch_count": len(pending),
+        "total_bytes": 0,
+        "unknown_size": [],
+        "errors": {},
+        "throughput_bytes_per_second": None,
+        "estimated_seconds": 0.0 if not pending else None,
+        "free_bytes": _free_disk_bytes(cache_dir),
+        "archives_fit_on_disk": True,
+        "plan_seconds": 0.0,
+    }
+
+    if pending:
+        import requests
+        from concurrent.futures import ThreadPoolExecutor
+        from requests.adapters import HTTPAdapter
+
+        if source is None:
+            source = auto_select_source(proxy=proxy, reporter=get_reporter(reporter))
+        plan["source"] = source = source.lower()
+
+        tar_filename = _package_filename()
+        urls = {name: f"{_build_dataset_base_url(name, source)}/{tar_filename}" for name in pending}
+        workers = max(1, min(max_workers, len(pending)))
+
+        with requests.Session() as session:
+            adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if proxy:
+                session.proxies = {"http": proxy, "https": proxy}
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                sizes = dict(zip(pending, pool.map(lambda name: _head_size(session, urls[name], timeout), pending)))
+
+            largest = None
+            for name, (size, error) in sizes.items():
+                if error:
+                    plan["errors"][name] = error
+                elif size is None:
+                    plan["unknown_size"].append(name)
+                else:
+                    plan["total_bytes"] += size
+                    if largest is None or size > sizes[largest][0]:
+                        largest = name
+
+            if largest is not None:
+                plan["throughput_bytes_per_second"] = _measure_throughput(session, urls[largest], timeout)
+
+        if plan["throughput_bytes_per_second"]:
+            plan["estimated_seconds"] = plan["total_bytes"] / plan["throughput_bytes_per_second"]
+        plan["archives_fit_on_disk"] = plan["total_bytes"] <= plan["free_bytes"]
+
+    plan["plan_seconds"] = time.perf_counter() - start
+    return plan
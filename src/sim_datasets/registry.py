@@ -0,0 +1,183 @@
+"""
+配置注册表：进程内一次性加载 configs/*.txt，之后的查询全部在内存索引上完成。
+
+支持:
+    - 按配置名精确查询（'srsd/srsd-feynman_easy' 与 'srsd.srsd-feynman_easy' 等价）
+    - 数据集前缀查询与 glob / 正则选择（如 'srsd/srsd-feynman_easy/*'）
+    - 反向查询：某个数据集属于哪些配置
+    - 配置之间的集合运算（并、交、差）
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+_GLOB_CHARS = "*?["
+
+_registry: Optional["ConfigRegistry"] = None
+
+
+def _normalize_config_name(config_name: str) -> str:
+    """将 'a/b' 形式的配置名转换为配置文件使用的 'a.b' 形式。"""
+    return config_name.strip().replace("/", ".")
+
+
+def is_pattern(name: str) -> bool:
+    """判断名称中是否包含 glob 通配符。"""
+    return any(ch in name for ch in _GLOB_CHARS)
+
+
+class ConfigRegistry:
+    """
+    配置注册表，保存所有配置文件的内容以及正向 / 反向索引。
+
+    正向查询为 O(1)，前缀查询基于有序数据集名称做二分查找，为 O(log n + k)。
+    """
+
+    def __init__(self, configs: Dict[str, Tuple[str, ...]], configs_dir: Optional[Path] = None):
+        self.configs_dir = configs_dir
+        self._configs = dict(configs)
+        self._build_index()
+
+    def _build_index(self) -> None:
+        reverse: Dict[str, set] = {}
+        for name, datasets in self._configs.items():
+            for dataset in datasets:
+                reverse.setdefault(dataset, set()).add(name)
+        self._reverse: Dict[str, FrozenSet[str]] = {k: frozenset(v) for k, v in reverse.items()}
+        self._sorted_datasets: Tuple[str, ...] = tuple(sorted(self._reverse))
+
+    def register(self, config_name: str, datasets: List[str]) -> None:
+        """
+        在内存中注册（或覆盖）一个配置，不写入 configs 目录。
+
+        用于自定义数据集组合或基准测试中的合成配置；注册后会重建索引。
+        """
+        self._configs[_normalize_config_name(config_name)] = tuple(d.strip() for d in datasets if d.strip())
+        self._build_index()
+
+    @classmethod
+    def from_directory(cls, configs_dir) -> "ConfigRegistry":
+        """
+        从配置目录加载注册表。
+
+        Args:
+            configs_dir: 包含 *.txt 配置文件的目录
+
+        Returns:
+            ConfigRegistry 实例
+
+        Raises:
+            ValueError: 当某个配置文件读取失败时
+        """
+        configs_dir = Path(configs_dir)
+        configs: Dict[str, Tuple[str, ...]] = {}
+        for config_file in sorted(configs_dir.glob("*.txt")):
+            try:
+                with open(config_file, "r", encoding="utf-8") as f:
+                    configs[config_file.stem] = tuple(line.strip() for line in f if line.strip())
+            except Exception as e:
+                raise ValueError(f"读取配置文件失败 {config_file}: {e}")
+        return cls(configs, configs_dir=configs_dir)
+
+    def __contains__(self, config_name: str) -> bool:
+        return _normalize_config_name(config_name) in self._configs
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    def config_names(self) -> List[str]:
+        """返回所有配置名（文件名形式，如 'srbench1.0.feynman'）。"""
+        return sorted(self._configs)
+
+    def all_datasets(self) -> List[str]:
+        """返回所有配置中出现过的数据集（去重并排序）。"""
+        return list(self._sorted_datasets)
+
+    def get(self, config_name: str) -> List[str]:
+        """
+        返回配置中的数据集列表。
+
+        Raises:
+            FileNotFoundError: 当配置不存在时
+        """
+        key = _normalize_config_name(config_name)
+        try:
+            return list(self._configs[key])
+        except KeyError:
+            location = self.configs_dir / f"{key}.txt" if self.configs_dir else key
+            raise FileNotFoundError(f"配置文件不存在: {location}") from None
+
+    def configs_containing(self, dataset_name: str) -> List[str]:
+        """反向查询：返回包含指定数据集的所有配置名。"""
+        return sorted(self._reverse.get(dataset_name.strip(), ()))
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        """返回名称以 prefix 开头的全部数据集。"""
+        datasets = self._sorted_datasets
+        start = bisect_left(datasets, prefix)
+        end = start
+        while end < len(datasets) and datasets[end].startswith(prefix):
+            end += 1
+        return list(datasets[start:end])
+
+    def glob(self, pattern: str) -> List[str]:
+        """
+        按 glob 模式选择数据集，如 'srsd/srsd-feynman_easy/*'。
+
+        通配符之前的字面前缀先用二分查找缩小候选范围，再逐个匹配。
+        """
+        from fnmatch import fnmatchcase
+
+        pattern = pattern.strip()
+        cut = min((pattern.index(ch) for ch in _GLOB_CHARS if ch in pattern), default=len(pattern))
+        candidates = self.with_prefix(pattern[:cut])
+        return [dataset for dataset in candidates if fnmatchcase(dataset, pattern)]
+
+    def regex(self, pattern: str) -> List[str]:
+        """按正则表达式（re.search 语义）选择数据集。"""
+        import re
+
+        compiled = re.compile(pattern)
+        return [dataset for dataset in self._sorted_datasets if compiled.search(dataset)]
+
+    def select(self, name: str) -> List[str]:
+        """配置名直接返回其数据集列表；包含通配符时按 glob 选择。"""
+        if is_pattern(name):
+            return self.glob(name)
+        return self.get(name)
+
+    def union(self, *config_names: str) -> List[str]:
+        """多个配置的并集，保持首次出现的顺序。"""
+        seen = set()
+        result = []
+        for config_name in config_names:
+            for dataset in self.get(config_name):
+                if dataset not in seen:
+                    seen.add(dataset)
+                    result.append(dataset)
+        return result
+
+    def intersection(self, first: str, *others: str) -> List[str]:
+        """多个配置的交集，顺序与第一个配置一致。"""
+        keep = set(self.get(first))
+        for config_name in others:
+            keep.intersection_update(self.get(config_name))
+        return [dataset for dataset in self.get(first) if dataset in keep]
+
+    def difference(self, first: str, *others: str) -> List[str]:
+        """第一个配置减去其余配置，顺序与第一个配置一致。"""
+        drop = set()
+        for config_name in others:
+            drop.update(self.get(config_name))
+        return [dataset for dataset in self.get(first) if dataset not in drop]
+
+
+def get_registry() -> ConfigRegistry:
+    """返回进程内共享的配置注册表，首次调用时加载 configs 目录。"""
+    global _registry
+    if _registry is None:
+        _registry = ConfigRegistry.from_directory(Path(__file__).parent / "configs")
+    return _registry
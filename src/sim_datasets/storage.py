@@ -0,0 +1,295 @@
+"""
+容器存储后端：将同一配置下的全部数据集打包进单个无压缩 zip 文件。
+
+在 Lustre/NFS 等共享文件系统上，成千上万个小文件的元数据操作开销远大于数据本身。
+打包后节点只需打开一个文件；由于成员以 ZIP_STORED 方式存储，每个成员在容器中
+都是一段连续字节，可以直接通过 mmap 零拷贝访问。
+
+容器内成员路径为 '<dataset_name>/<相对文件路径>'，例如
+'srbench1.0/feynman/feynman_I_6_2/train.csv'；另有一个索引成员 INDEX_NAME 记录容器中的数据集列表。
+
+容器只通过"写临时文件 + os.replace"整体替换，写入过程中被中断不会损坏已有容器；
+同一容器的写入由 <容器文件>.lock 上的文件锁串行化。
+"""
+
+from __future__ import annotations
+
+import contextlib
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+PACK_SUFFIX = ".pack.zip"
+INDEX_NAME = ".sim_datasets_index.json"
+
+# zip 本地文件头固定部分长度，以及文件名长度 / 扩展字段长度在头中的偏移
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_NAME_LEN_OFFSET = 26
+
+
+def pack_path(config_name: str, cache_dir=None) -> Path:
+    """返回配置对应的容器文件路径，如 <cache_dir>/srbench1.0.feynman.pack.zip。"""
+    from .registry import is_pattern
+    from .utils import _resolve_cache_dir
+
+    if is_pattern(config_name):
+        raise ValueError(f"容器存储不支持通配符配置名: {config_name}")
+    return _resolve_cache_dir(cache_dir) / (config_name.strip().replace("/", ".") + PACK_SUFFIX)
+
+
+class DatasetPack:
+    """
+    只读的数据集容器，按数据集名称随机访问成员。
+
+    用法:
+        with DatasetPack(path) as pack:
+            names = pack.files("srbench1.0/feynman/feynman_I_6_2")
+            data = pack.read("srbench1.0/feynman/feynman_I_6_2", "train.csv")
+            view = pack.memoryview("srbench1.0/feynman/feynman_I_6_2", "train.csv")
+    """
+
+    def __init__(self, path):
+        import zipfile
+
+        self.path = Path(path)
+        self._zip = zipfile.ZipFile(self.path, "r")
+        self._infos: Dict[str, "zipfile.ZipInfo"] = {
+            info.filename: info
+            for info in self._zip.infolist()
+            if not info.is_dir() and info.filename != INDEX_NAME
+        }
+        self._names: List[str] = sorted(self._infos)
+        self._datasets: Optional[List[str]] = None
+        if INDEX_NAME in self._zip.NameToInfo:
+            import json
+
+            self._datasets = json.loads(self._zip.read(INDEX_NAME).decode("utf-8"))
+            self._dataset_set = set(self._datasets)
+        self._file = None
+        self._mmap = None
+
+    def __enter__(self) -> "DatasetPack":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """关闭容器及其 mmap。已返回的 memoryview 需在关闭前释放。"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._zip.close()
+
+    def __contains__(self, dataset_name: str) -> bool:
+        if self._datasets is not None:
+            return dataset_name.rstrip("/") in self._dataset_set
+        prefix = dataset_name.rstrip("/") + "/"
+        index = bisect_left(self._names, prefix)
+        return index < len(self._names) and self._names[index].startswith(prefix)
+
+    def datasets(self, candidates: Optional[List[str]] = None) -> List[str]:
+        """
+        返回容器中的数据集名称；给出 candidates 时只返回其中位于容器内的数据集，保持原顺序。
+
+        Raises:
+            ValueError: 当容器没有数据集索引且未给出 candidates 时
+        """
+        if candidates is not None:
+            return [name for name in candidates if name in self]
+        if self._datasets is None:
+            raise ValueError(f"容器 {self.path} 没有数据集索引，请传入候选数据集列表")
+        return list(self._datasets)
+
+    def files(self, dataset_name: str) -> List[str]:
+        """返回数据集内全部文件的相对路径。"""
+        prefix = dataset_name.rstrip("/") + "/"
+        start = bisect_left(self._names, prefix)
+        end = start
+        while end < len(self._names) and self._names[end].startswith(prefix):
+            end += 1
+        return [name[len(prefix):] for name in self._names[start:end]]
+
+    def _info(self, dataset_name: str, filename: str):
+        member = f"{dataset_name.rstrip('/')}/{filename}"
+        try:
+            return self._infos[member]
+        except KeyError:
+            raise FileNotFoundError(f"容器 {self.path} 中不存在 {member}") from None
+
+    def open(self, dataset_name: str, filename: str):
+        """以二进制文件对象的形式打开成员。"""
+        return self._zip.open(self._info(dataset_name, filename))
+
+    def read(self, dataset_name: str, filename: str) -> bytes:
+        """读取成员的全部字节。"""
+        return self._zip.read(self._info(dataset_name, filename))
+
+    def memoryview(self, dataset_name: str, filename: str) -> memoryview:
+        """
+        返回成员数据在 mmap 上的零拷贝视图。
+
+        Raises:
+            ValueError: 当成员不是以 ZIP_STORED 方式存储时
+        """
+        import mmap
+        import struct
+        import zipfile
+
+        info = self._info(dataset_name, filename)
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"成员 {info.filename} 经过压缩，无法直接映射")
+        if info.file_size == 0:
+            return memoryview(b"")
+
+        if self._mmap is None:
+            self._file = open(self.path, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        offset = info.header_offset
+        name_len, extra_len = struct.unpack_from(
+            "<HH", self._mmap, offset + _LOCAL_HEADER_NAME_LEN_OFFSET
+        )
+        start = offset + _LOCAL_HEADER_SIZE + name_len + extra_len
+        return memoryview(self._mmap)[start:start + info.file_size]
+
+
+@contextlib.contextmanager
+def _pack_lock(pack_file: Path):
+    """持有容器的写锁；进程退出时操作系统会自动释放。"""
+    lock_path = pack_file.with_name(pack_file.name + ".lock")
+    with open(lock_path, "a+b") as f:
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def pack_datasets(
+    datasets: List[str], pack_file, cache_dir=None, remove_source: bool = True, keep_sources: Iterable[str] = ()
+) -> List[str]:
+    """
+    将缓存目录中已解压的数据集写入容器文件。
+
+    新容器先写到同目录下的临时文件（复制已有成员后追加新数据集），完成后用 os.replace
+    原子替换；只有替换成功后才删除原始目录，中断时已有容器和原始目录都保持不变。
+
+    Args:
+        datasets: 要打包的数据集名称列表
+        pack_file: 容器文件路径，不存在时自动创建
+        cache_dir: 缓存目录，如果为None则使用默认目录
+        remove_source: 打包后是否删除本次写入容器的数据集的原始目录，以减少小文件数量
+        keep_sources: 即使 remove_source 为 True 也保留原始目录的数据集；配置之间共享数据集，
+            下载时已作为目录缓存存在的数据集可能仍被其他配置使用，调用方应把它们放在这里
+
+    Returns:
+        本次新写入容器的数据集名称列表
+    """
+    import json
+    import os
+    import shutil
+    import tempfile
+    import zipfile
+
+    from .utils import _resolve_cache_dir
+
+    cache_dir = _resolve_cache_dir(cache_dir)
+    pack_file = Path(pack_file)
+    pack_file.parent.mkdir(parents=True, exist_ok=True)
+
+    with _pack_lock(pack_file):
+        existing: List[str] = []
+        indexed: List[str] = []
+        if pack_file.exists():
+            with DatasetPack(pack_file) as pack:
+                existing = pack.datasets(datasets)
+                try:
+                    indexed = pack.datasets()
+                except ValueError:
+                    # 没有索引的旧容器：只能确认候选列表中已存在的数据集
+                    indexed = existing
+        existing_set = set(existing)
+
+        pending = []
+        for dataset_name in datasets:
+            dataset_dir = cache_dir / Path(dataset_name)
+            if dataset_name in existing_set or not dataset_dir.is_dir():
+                continue
+            files = sorted(p for p in dataset_dir.rglob("*") if p.is_file())
+            if files:
+                pending.append((dataset_name, dataset_dir, files))
+
+        packed = [dataset_name for dataset_name, _, _ in pending]
+        if packed:
+            fd, tmp_name = tempfile.mkstemp(prefix=f".{pack_file.name}.", suffix=".tmp", dir=pack_file.parent)
+            os.close(fd)
+            try:
+                with zipfile.ZipFile(tmp_name, "w", compression=zipfile.ZIP_STORED) as zf:
+                    if pack_file.exists():
+                        with zipfile.ZipFile(pack_file, "r") as old:
+                            for info in old.infolist():
+                                if info.filename == INDEX_NAME:
+                                    continue
+                                copied = zipfile.ZipInfo(info.filename, info.date_time)
+                                copied.external_attr = info.external_attr
+                                copied.file_size = info.file_size
+                                with old.open(info) as src, zf.open(copied, "w") as dst:
+                                    shutil.copyfileobj(src, dst, 1 << 20)
+                    for dataset_name, dataset_dir, files in pending:
+                        for file_path in files:
+                            arcname = f"{dataset_name}/{file_path.relative_to(dataset_dir).as_posix()}"
+                            zf.write(file_path, arcname)
+                    index = indexed + [name for name in packed if name not in indexed]
+                    zf.writestr(INDEX_NAME, json.dumps(index, ensure_ascii=False))
+                os.replace(tmp_name, pack_file)
+            except BaseException:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(tmp_name)
+                raise
+
+    if remove_source:
+        keep = set(keep_sources)
+        for dataset_name in packed:
+            if dataset_name in keep:
+                continue
+            dataset_dir = cache_dir / Path(dataset_name)
+            if not dataset_dir.is_dir():
+                continue
+            shutil.rmtree(dataset_dir)
+            # 清理因此变空的上级目录
+            parent = dataset_dir.parent
+            while parent != cache_dir and parent.is_dir() and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+
+    return packed
+
+
+def open_pack(config_name: str, cache_dir=None) -> DatasetPack:
+    """
+    打开配置对应的容器文件。
+
+    Raises:
+        FileNotFoundError: 当容器文件不存在时
+    """
+    path = pack_path(config_name, cache_dir)
+    if not path.exists():
+        raise FileNotFoundError(f"容器文件不存在: {path}")
+    return DatasetPack(path)
@@ -1,5 +1,13 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+
+# 下载压缩包的最大尝试次数（含首次请求）；连接错误、超时和以下状态码会在退避后重试
+_MAX_ATTEMPTS = 3
+# 第 n 次重试前等待 _RETRY_BACKOFF * 2 ** (n - 1) 秒
+_RETRY_BACKOFF = 1.0
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
 
 def _resolve_cache_dir(cache_dir=None):
     """解析缓存目录，默认使用当前目录下的 .sim_datasets。"""
@@ -26,7 +34,9 @@ def _build_dataset_base_url(dataset_name: str, source: str) -> str:
     return f"https://modelscope.cn/datasets/scientific-intelligent-modelling/sim-datasets/resolve/master/{dataset_name}"
 
 
-def _build_failure_result(dataset_data: dict, tar_filename: str, download_url: str, error: str) -> dict:
+def _build_failure_result(dataset_data: dict, tar_filename: str, download_url: str, error: str, reporter=None) -> dict:
+    if reporter is not None:
+        reporter.emit("failure", dataset_data["dataset_name"], error=error, url=download_url)
     dataset_data["success"] = False
     dataset_data["files"][tar_filename] = {
         "path": None,
@@ -37,17 +47,186 @@ def _build_failure_result(dataset_data: dict, tar_filename: str, download_url: s
     return dataset_data
 
 
-def check_ip_location(proxy: str = "") -> bool:
+def _package_filename() -> str:
+    """
+    返回数据集压缩包文件名，默认为 package.tar.gz。
+
+    仓库发布 zstd 压缩包时，可设置 SIM_DATASETS_PACKAGE_FORMAT=tar.zst 下载 package.tar.zst。
+    """
+    import os
+
+    fmt = os.environ.get("SIM_DATASETS_PACKAGE_FORMAT", "").strip() or "tar.gz"
+    if fmt not in ("tar.gz", "tar.zst"):
+        raise ValueError(f"不支持的压缩包格式: {fmt}，可选值为 'tar.gz' 或 'tar.zst'")
+    return f"package.{fmt}"
+
+
+def _check_decompress_backend() -> None:
+    """
+    下载前确认压缩包格式有可用的解压后端，SIM_DATASETS_DECOMPRESS_BACKEND 配置错误时
+    在发起下载之前报错，而不是下载完成后才在解压时失败。
+
+    Raises:
+        ValueError: 当指定的后端不可用或不支持当前压缩包格式时
+    """
+    from .decompress import select_backend
+
+    select_backend("zstd" if _package_filename().endswith(".zst") else "gzip")
+
+
+def _emit_retry(reporter, dataset_name: str, tar_filename: str, attempt: int, error: str) -> float:
+    """发出 retry 事件，返回重试前应等待的秒数。"""
+    delay = _RETRY_BACKOFF * 2 ** (attempt - 1)
+    reporter.emit(
+        "retry",
+        dataset_name,
+        message=f"  下载 {tar_filename} 失败: {error}，{delay:g} 秒后重试（第 {attempt}/{_MAX_ATTEMPTS - 1} 次）",
+        attempt=attempt,
+        error=error,
+        delay=delay,
+    )
+    return delay
+
+
+@contextmanager
+def _proxy_env(proxy: str):
+    """
+    在上下文中把 proxy 写入 HTTP_PROXY / HTTPS_PROXY，退出时（包括抛出异常时）恢复原值，
+    代理设置不会泄漏到调用方的进程环境中。
+    """
+    import os
+
+    if not proxy:
+        yield
+        return
+    saved = {key: os.environ.get(key) for key in ('HTTP_PROXY', 'HTTPS_PROXY')}
+    os.environ.update(dict.fromkeys(saved, proxy))
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _result_error(result: dict) -> str:
+    """从单数据集下载结果中取出错误信息。"""
+    for info in result.get("files", {}).values():
+        if isinstance(info, dict) and info.get("error"):
+            return info["error"]
+    return result.get("files", {}).get("extract_error", "unknown_error")
+
+
+def _is_valid_package(tar_path) -> bool:
+    """
+    通过文件头验证压缩包是否为 gzip / zstd 格式，用于识别被保存下来的 HTML 错误页面。
+
+    只读取前几个字节，不做完整解压；内容损坏会在解压时被发现。
+    """
+    from .decompress import detect_format
+
+    return detect_format(tar_path) is not None
+
+
+def _extract_package(tar_path, dataset_dir, dataset_data: dict, reporter=None) -> dict:
+    """
+    解压压缩包到数据集目录并删除压缩包，结果写回 dataset_data。
+
+    先解压到数据集目录旁的临时目录，成功后删除压缩包并用临时目录整体替换数据集目录；
+    解压失败时删除临时目录和压缩包，数据集目录不会残留半截内容，下次下载会重新获取。
+    解压后端见 decompress 模块，实际使用的后端记录在 dataset_data['decompress_backend']。
+    """
+    import os
+    import shutil
+    import tempfile
+    from pathlib import Path
+
+    from .decompress import extract_archive
+    from .events import get_reporter
+
+    reporter = get_reporter(reporter)
+    dataset_name = dataset_data['dataset_name']
+    staging = Path(tempfile.mkdtemp(prefix=f".{dataset_dir.name}.extract-", dir=dataset_dir.parent))
+    try:
+        reporter.emit("extract_start", dataset_name, message=f"  解压 {tar_path} ...")
+        backend = extract_archive(tar_path, staging)
+        dataset_data['decompress_backend'] = backend
+        reporter.emit("extract_finish", dataset_name, message=f"  ✅ 解压完成 ({backend})", backend=backend)
+        # 数据集目录中只有压缩包（或上次的旧内容），整体替换为解压结果
+        shutil.rmtree(dataset_dir)
+        os.replace(staging, dataset_dir)
+        reporter.info(f"  已删除 {tar_path}")
+        dataset_data['success'] = True
+        reporter.emit("finish", dataset_name, bytes=dataset_data['total_size'])
+    except Exception as e:
+        reporter.emit("failure", dataset_name, message=f"  解压或删除 {tar_path} 失败: {e}", error=str(e))
+        dataset_data['files']['extract_error'] = str(e)
+        dataset_data['success'] = False
+        shutil.rmtree(staging, ignore_errors=True)
+        if tar_path.exists():
+            tar_path.unlink()
+
+    return dataset_data
+
+
+def _open_pack_index(config_name: str, datasets_list: list, cache_dir, storage: str):
+    """
+    解析存储后端，返回 (容器文件路径, 已在容器中的数据集集合)。
+
+    storage 为 "files" 时容器文件路径为 None，新下载的数据集不会写入容器；但该配置已有容器文件
+    （例如通过 import_cache 导入的打包缓存）时，其中的数据集仍算作缓存命中，损坏的容器文件被忽略。
+
+    Raises:
+        ValueError: 当存储后端未知，或 storage 为 "pack" 且容器文件已损坏时
+    """
+    if storage not in ("files", "pack"):
+        raise ValueError(f"不支持的存储后端: {storage}，可选值为 'files' 或 'pack'")
+
+    import os
+
+    from .registry import is_pattern
+
+    if storage == "files" and is_pattern(config_name):
+        return None, set()
+
+    from .storage import pack_path
+
+    pack_file = pack_path(config_name, cache_dir)
+    if not os.path.exists(pack_file):
+        return (pack_file if storage == "pack" else None), set()
+
+    import zipfile
+
+    from .storage import DatasetPack
+
+    try:
+        with DatasetPack(pack_file) as pack:
+            packed = set(pack.datasets(datasets_list))
+    except zipfile.BadZipFile as e:
+        if storage == "files":
+            return None, set()
+        raise ValueError(f"容器文件已损坏: {pack_file} ({e})，请删除该文件后重新下载") from e
+    return (pack_file if storage == "pack" else None), packed
+
+
+def check_ip_location(proxy: str = "", reporter=None) -> bool:
     """
     检查当前IP是否在中国大陆
     
     Args:
         proxy: 代理地址，空字符串表示不使用代理
+        reporter: 进度事件分发器，如果为None则使用当前上下文或默认的打印输出
         
     Returns:
         True表示在大陆，False表示非大陆
     """
     import requests
+
+    from .events import get_reporter
+
+    reporter = get_reporter(reporter)
     
     # 设置代理
     proxies = {}
@@ -56,7 +235,7 @@ def check_ip_location(proxy: str = "") -> bool:
             'http': proxy,
             'https': proxy
         }
-        print(f"使用代理检测IP位置: {proxy}")
+        reporter.info(f"使用代理检测IP位置: {proxy}")
     
     try:
         # 使用多个服务来确保准确性
@@ -79,38 +258,42 @@ def check_ip_location(proxy: str = "") -> bool:
                         country = data['country_name']
                     
                     if country:
-                        print(f"检测到IP所在国家: {country}")
+                        reporter.info(f"检测到IP所在国家: {country}")
                         return country.lower() in ['china', 'cn', '中国']
                         
             except Exception as e:
-                print(f"服务 {service} 检测失败: {e}")
+                reporter.info(f"服务 {service} 检测失败: {e}")
                 continue
                 
         # 如果所有服务都失败，默认假设在大陆
-        print("IP位置检测失败，默认使用ModelScope")
+        reporter.info("IP位置检测失败，默认使用ModelScope")
         return True
         
     except Exception as e:
-        print(f"IP检测过程中发生错误: {e}")
+        reporter.info(f"IP检测过程中发生错误: {e}")
         return True
 
 
-def auto_select_source(proxy: str = "") -> str:
+def auto_select_source(proxy: str = "", reporter=None) -> str:
     """
     根据IP位置自动选择下载源
     
     Args:
         proxy: 代理地址，空字符串表示不使用代理
+        reporter: 进度事件分发器，如果为None则使用当前上下文或默认的打印输出
         
     Returns:
         "modelscope" 或 "huggingface"
     """
-    is_china = check_ip_location(proxy=proxy)
+    from .events import get_reporter
+
+    reporter = get_reporter(reporter)
+    is_china = check_ip_location(proxy=proxy, reporter=reporter)
     if is_china:
-        print("检测到中国IP，使用ModelScope下载源")
+        reporter.info("检测到中国IP，使用ModelScope下载源")
         return "modelscope"
     else:
-        print("检测到海外IP，使用HuggingFace下载源")
+        reporter.info("检测到海外IP，使用HuggingFace下载源")
         return "huggingface"
 
 
@@ -123,6 +306,7 @@ def get_datasets_list(config_name: str) -> list:
             - 简单名称：'llm-srbench', 'srbench1.0', 'srsd'
             - 子数据集：'bio_pop_growth', 'chem_react', 'lsrtransform', 'matsci', 'phys_osc'
             - 完整路径：'llm-srbench/bio_pop_growth', 'srbench1.0/feynman', 'srsd/srsd-feynman_easy'
+            - 通配符：'srsd/srsd-feynman_easy/*', 'srbench1.0/*/feynman_I_*'
     
     Returns:
         数据集列表，每个元素是一个字符串
@@ -131,54 +315,67 @@ def get_datasets_list(config_name: str) -> list:
         ValueError: 当数据集名称无效时
         FileNotFoundError: 当配置文件不存在时
     """
-    import os
-    from pathlib import Path
-    
-    # 获取当前文件所在目录
-    current_dir = Path(__file__).parent
-    configs_dir = current_dir / "configs"
-    
-    # 将路径中的"/"转换为"."来匹配文件名
-    config_filename = config_name.replace("/", ".") + ".txt"
-    config_file_path = configs_dir / config_filename
-    
-    # 检查文件是否存在
-    if not config_file_path.exists():
-        raise FileNotFoundError(f"配置文件不存在: {config_file_path}")
-    
-    # 读取配置文件
-    try:
-        with open(config_file_path, 'r', encoding='utf-8') as f:
-            # 读取所有行，去除空白字符，过滤掉空行
-            datasets = [line.strip() for line in f.readlines() if line.strip()]
-        
-        return datasets
-        
-    except Exception as e:
-        raise ValueError(f"读取配置文件失败 {config_file_path}: {e}")
-    
+    from .registry import get_registry
+
+    # 配置文件只在进程内首次读取一次，之后直接查询内存索引；名称中含通配符时按 glob 选择
+    return get_registry().select(config_name)
+
+
+def _fetch_archive(download_url: str, tar_path, proxies: dict, dataset_name: str, reporter) -> int:
+    """
+    请求一次压缩包，状态码为 200 时流式写入 tar_path，返回 HTTP 状态码。
 
-def download_single_dataset(dataset_name: str, source: str = None, proxy="", cache_dir=None):
+    网络错误以 requests 异常抛出，由调用方决定是否重试。
     """
-    下载单个数据集的 package.tar.gz 文件，解压后删除压缩包。
+    import requests
+
+    from .events import BYTES_EVENT_INTERVAL
+
+    with requests.get(download_url, proxies=proxies, timeout=60, stream=True) as response:
+        if response.status_code != 200:
+            return response.status_code
+        received = 0
+        pending = 0
+        with open(tar_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=8192):
+                if chunk:
+                    f.write(chunk)
+                    received += len(chunk)
+                    pending += len(chunk)
+                    if pending >= BYTES_EVENT_INTERVAL:
+                        reporter.emit("bytes_received", dataset_name, bytes=pending, total_bytes=received)
+                        pending = 0
+        if pending:
+            reporter.emit("bytes_received", dataset_name, bytes=pending, total_bytes=received)
+    return 200
+
+
+def download_single_dataset(dataset_name: str, source: str = None, proxy="", cache_dir=None, reporter=None):
+    """
+    下载单个数据集的压缩包（默认 package.tar.gz），解压后删除压缩包。
     
     Args:
         dataset_name: 数据集名称，格式如 "llm-srbench/bio_pop_growth/BPG0"
         source: 数据源，支持 "modelscope" 或 "huggingface"，如果为None则自动根据IP位置选择
         proxy: 代理地址，空字符串表示不使用代理
         cache_dir: 缓存目录，如果为None则使用默认目录
+        reporter: 进度事件分发器，如果为None则使用当前上下文或默认的打印输出
         
     Returns:
         下载的数据集内容字典
     """
     import requests
     from pathlib import Path
-    import tarfile
-    import shutil
+
+    from .events import get_reporter
     
+    reporter = get_reporter(reporter)
+    # 解压后端配置错误时在任何网络请求之前报错
+    _check_decompress_backend()
+
     # 如果未指定数据源，自动选择
     if source is None:
-        source = auto_select_source(proxy=proxy)
+        source = auto_select_source(proxy=proxy, reporter=reporter)
     
     source = source.lower()
 
@@ -190,16 +387,16 @@ def download_single_dataset(dataset_name: str, source: str = None, proxy="", cac
             'https': proxy
         }
     
-    # 构建 package.tar.gz 的 URL
+    # 构建压缩包的 URL
     if source == 'huggingface':
         base_url = f"https://huggingface.co/datasets/scientific-intelligent-modelling/sim-datasets/resolve/main/{dataset_name}"
     else:  # ModelScope
         base_url = f"https://modelscope.cn/datasets/scientific-intelligent-modelling/sim-datasets/resolve/master/{dataset_name}"
     
-    tar_filename = 'package.tar.gz'
+    tar_filename = _package_filename()
     download_url = f"{base_url}/{tar_filename}"
 
-    print(f"从 {source} 下载 {dataset_name} 的 {tar_filename} ...")
+    reporter.info(f"从 {source} 下载 {dataset_name} 的 {tar_filename} ...")
 
     dataset_data = {
         'dataset_name': dataset_name,
@@ -221,72 +418,60 @@ def download_single_dataset(dataset_name: str, source: str = None, proxy="", cac
     base_url = _build_dataset_base_url(dataset_name, source)
     download_url = f"{base_url}/{tar_filename}"
 
-    # 下载 package.tar.gz
+    # 下载压缩包
+    reporter.emit("start", dataset_name, url=download_url, source=source)
     if not tar_path.exists():
-        try:
-            print(f"  下载 {tar_filename} ...")
-            response = requests.get(download_url, proxies=proxies, timeout=60, stream=True)
-            if response.status_code == 200:
-                with open(tar_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                file_size = tar_path.stat().st_size
-                
-                # 验证下载的文件是否为有效的tar.gz文件
-                try:
-                    with tarfile.open(tar_path, 'r:gz') as test_tar:
-                        # 尝试读取文件列表来验证格式
-                        test_tar.getnames()
-                    print(f"  ✅ {tar_filename} 已保存到 {tar_path} (已验证格式)")
-                except tarfile.ReadError:
-                    # 如果不是有效的tar.gz文件，可能是HTML错误页面，删除并报错
-                    tar_path.unlink()
-                    error_msg = f"下载的文件不是有效的tar.gz格式，可能是404错误页面"
-                    print(f"  ❌ {error_msg}")
-                    return _build_failure_result(dataset_data, tar_filename, download_url, error_msg)
-                
-                dataset_data['files'][tar_filename] = {
-                    'path': str(tar_path),
-                    'size': file_size,
-                    'url': download_url
-                }
-                dataset_data['total_size'] += file_size
-                print(f"  ✅ {tar_filename} 已保存到 {tar_path}")
-            else:
-                print(f"  下载 {tar_filename} 失败: HTTP {response.status_code}")
-                return _build_failure_result(dataset_data, tar_filename, download_url, f"HTTP {response.status_code}")
-        except Exception as e:
-            print(f"  下载 {tar_filename} 失败: {e}")
-            return _build_failure_result(dataset_data, tar_filename, download_url, str(e))
+        import time
+
+        reporter.info(f"  下载 {tar_filename} ...")
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            try:
+                status = _fetch_archive(download_url, tar_path, proxies, dataset_name, reporter)
+                error = None if status == 200 else f"HTTP {status}"
+                retryable = status in _RETRY_STATUS
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                error, retryable = str(e), True
+            except Exception as e:
+                error, retryable = str(e), False
+            if error is None or not retryable or attempt == _MAX_ATTEMPTS:
+                break
+            time.sleep(_emit_retry(reporter, dataset_name, tar_filename, attempt, error))
+
+        if error is not None:
+            # 中断的下载不能留在缓存中，否则下次会被当作已缓存的压缩包
+            tar_path.unlink(missing_ok=True)
+            reporter.info(f"  下载 {tar_filename} 失败: {error}")
+            return _build_failure_result(dataset_data, tar_filename, download_url, error, reporter)
+
+        # 验证下载的文件是否为有效的tar.gz文件
+        if not _is_valid_package(tar_path):
+            # 如果不是有效的tar.gz文件，可能是HTML错误页面，删除并报错
+            tar_path.unlink()
+            error_msg = f"下载的文件不是有效的 gzip/zstd 压缩包，可能是404错误页面"
+            reporter.info(f"  ❌ {error_msg}")
+            return _build_failure_result(dataset_data, tar_filename, download_url, error_msg, reporter)
+        reporter.info(f"  ✅ {tar_filename} 已保存到 {tar_path} (已验证格式)")
+
+        file_size = tar_path.stat().st_size
+        dataset_data['files'][tar_filename] = {
+            'path': str(tar_path),
+            'size': file_size,
+            'url': download_url
+        }
+        dataset_data['total_size'] += file_size
     else:
-        print(f"{tar_filename} 已缓存")
+        reporter.emit("cache_hit", dataset_name, message=f"{tar_filename} 已缓存", location="archive")
         dataset_data['files'][tar_filename] = {
             'path': str(tar_path),
             'size': tar_path.stat().st_size,
             'url': download_url,
         }
 
-    # 解压 package.tar.gz
-    try:
-        print(f"  解压 {tar_path} ...")
-        with tarfile.open(tar_path, 'r:gz') as tar:
-            tar.extractall(path=dataset_dir)
-        print(f"  ✅ 解压完成")
-        # 删除压缩包
-        tar_path.unlink()
-        print(f"  已删除 {tar_path}")
-        dataset_data['success'] = True
-    except Exception as e:
-        print(f"  解压或删除 {tar_path} 失败: {e}")
-        dataset_data['files']['extract_error'] = str(e)
-        dataset_data['success'] = False
-
-    return dataset_data
+    return _extract_package(tar_path, dataset_dir, dataset_data, reporter)
 
 
 
-def download_dataset(config_name: str, source: str = None, proxy="", cache_dir=None):
+def download_dataset(config_name: str, source: str = None, proxy="", cache_dir=None, storage: str = "files", reporter=None):
     """
     下载指定的数据集。
     
@@ -295,72 +480,121 @@ def download_dataset(config_name: str, source: str = None, proxy="", cache_dir=N
         source: 数据源，支持 "modelscope" 或 "huggingface"，如果为None则自动根据IP位置选择
         proxy: 代理地址，空字符串表示不使用代理
         cache_dir: 缓存目录，如果为None则使用默认目录
+        storage: 存储后端，"files" 保留解压后的目录，"pack" 将整个配置打包为单个容器文件
+        reporter: 进度事件分发器（ProgressReporter），可注册回调、写 JSON-lines 日志或静默输出
     Returns:
-        下载结果
+        下载结果，其中 "metrics" 为本次下载的吞吐量、分阶段耗时与延迟分位数
     """
-    import os
     from pathlib import Path
+
+    from .events import MetricsAggregator, get_reporter, use_reporter
+    
+    metrics = MetricsAggregator()
+    reporter = get_reporter(reporter)
+    # metrics 只在本次调用期间挂在调用方的 reporter 上，保留其子类行为
+    with reporter.attached(metrics):
+        # 获取数据集列表
+        datasets_list = get_datasets_list(config_name)
+    
+        # 设置缓存目录
+        cache_dir = _resolve_cache_dir(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        pack_file, packed = _open_pack_index(config_name, datasets_list, cache_dir, storage)
+    
+        # 代理环境变量只在下载期间生效，出错时同样会恢复
+        with _proxy_env(proxy):
+            downloaded_datasets = []
+            failed_datasets = []
+            # 下载前就已存在的目录缓存可能被其他配置共享，打包时保留其目录
+            directory_hits = []
+    
+            with use_reporter(reporter):
+                for dataset_name in datasets_list:
+                    dataset_dir = cache_dir / Path(dataset_name)
+            
+                    if dataset_name in packed:
+                        reporter.emit("cache_hit", dataset_name, message=f"数据集 {dataset_name} 已在容器中缓存，跳过下载", location="pack")
+                        downloaded_datasets.append(dataset_name)
+                        continue
+            
+                    # 检查是否已经缓存（检查目录是否存在且包含文件）
+                    if dataset_dir.exists() and any(dataset_dir.iterdir()):
+                        reporter.emit("cache_hit", dataset_name, message=f"数据集 {dataset_name} 已缓存，跳过下载", location="directory")
+                        downloaded_datasets.append(dataset_name)
+                        directory_hits.append(dataset_name)
+                        continue
+            
+                    # 解压后端配置错误时直接报错，不把每个数据集都记为失败
+                    _check_decompress_backend()
+                    # 如果未指定数据源，在第一次真正需要下载时才自动选择；全部命中缓存时不做任何网络探测
+                    if source is None:
+                        source = auto_select_source(proxy=proxy, reporter=reporter)
+            
+                    try:
+                        # 下载单个数据集，使用已测试的源；reporter 通过上下文传入
+                        result = download_single_dataset(dataset_name, source=source, proxy=proxy, cache_dir=cache_dir)
+                        if result.get("success"):
+                            downloaded_datasets.append(dataset_name)
+                            reporter.info(f"数据集 {dataset_name} 下载完成并保存到 {result['cache_path']}")
+                        else:
+                            reporter.info(f"数据集 {dataset_name} 下载失败: {_result_error(result)}")
+                            failed_datasets.append(dataset_name)
+                
+                    except Exception as e:
+                        reporter.emit("failure", dataset_name, message=f"数据集 {dataset_name} 下载失败: {e}", error=str(e))
+                        failed_datasets.append(dataset_name)
     
-    # 如果未指定数据源，自动选择
-    if source is None:
-        source = auto_select_source(proxy=proxy)
-    
-    # 获取数据集列表
-    datasets_list = get_datasets_list(config_name)
-    
-    # 设置缓存目录
-    cache_dir = _resolve_cache_dir(cache_dir)
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    
-    # 设置代理环境变量
-    if proxy:
-        os.environ['HTTP_PROXY'] = proxy
-        os.environ['HTTPS_PROXY'] = proxy
-    
-    downloaded_datasets = []
-    failed_datasets = []
-    
-    for dataset_name in datasets_list:
+        if pack_file is not None:
+            from .storage import pack_datasets
+
+            packed_now = pack_datasets(downloaded_datasets, pack_file, cache_dir=cache_dir, keep_sources=directory_hits)
+            reporter.info(f"已将 {len(packed_now)} 个数据集写入容器 {pack_file}")
+    
+        return {
+            "config_name": config_name,
+            "cache_dir": str(cache_dir),
+            "total_datasets": len(datasets_list),
+            "downloaded": downloaded_datasets,
+            "failed": failed_datasets,
+            "success_count": len(downloaded_datasets),
+            "failed_count": len(failed_datasets),
+            "storage": storage,
+            "pack_path": str(pack_file) if pack_file is not None else None,
+            "metrics": metrics.summary(),
+        }
+
+
+def _download_single_worker(dataset_name: str, source: str, proxy: str, cache_dir, quiet: bool) -> dict:
+    """进程池工作函数：下载单个数据集，并把子进程中产生的事件一并返回给父进程回放。"""
+    from pathlib import Path
+
+    from .events import ProgressReporter
+
+    events = []
+    reporter = ProgressReporter(callbacks=[events.append], quiet=quiet)
+    try:
         dataset_dir = cache_dir / Path(dataset_name)
         
-        # 检查是否已经缓存（检查目录是否存在且包含文件）
+        # 检查是否已经缓存
         if dataset_dir.exists() and any(dataset_dir.iterdir()):
-            print(f"数据集 {dataset_name} 已缓存，跳过下载")
-            downloaded_datasets.append(dataset_name)
-            continue
+            reporter.emit("cache_hit", dataset_name, message=f"数据集 {dataset_name} 已缓存，跳过下载", location="directory")
+            return {"dataset_name": dataset_name, "status": "cached", "error": None, "events": events}
         
-        try:
-            # 下载单个数据集，使用已测试的源
-            result = download_single_dataset(dataset_name, source=source, proxy=proxy, cache_dir=cache_dir)
-            if result.get("success"):
-                downloaded_datasets.append(dataset_name)
-                print(f"数据集 {dataset_name} 下载完成并保存到 {result['cache_path']}")
-            else:
-                print(f"数据集 {dataset_name} 下载失败: {result['files'].get('package.tar.gz', {}).get('error', 'unknown_error')}")
-                failed_datasets.append(dataset_name)
-            
-        except Exception as e:
-            print(f"数据集 {dataset_name} 下载失败: {e}")
-            failed_datasets.append(dataset_name)
-    
-    # 清理代理环境变量
-    if proxy:
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-    
-    return {
-        "config_name": config_name,
-        "cache_dir": str(cache_dir),
-        "total_datasets": len(datasets_list),
-        "downloaded": downloaded_datasets,
-        "failed": failed_datasets,
-        "success_count": len(downloaded_datasets),
-        "failed_count": len(failed_datasets),
-    }
-
+        # 下载数据集
+        result = download_single_dataset(dataset_name, source=source, proxy=proxy, cache_dir=cache_dir, reporter=reporter)
+        if result.get("success"):
+            reporter.info(f"数据集 {dataset_name} 下载完成")
+            return {"dataset_name": dataset_name, "status": "success", "result": result, "error": None, "events": events}
+        error = _result_error(result)
+        reporter.info(f"数据集 {dataset_name} 下载失败: {error}")
+        return {"dataset_name": dataset_name, "status": "failed", "result": result, "error": error, "events": events}
+        
+    except Exception as e:
+        reporter.emit("failure", dataset_name, message=f"数据集 {dataset_name} 下载失败: {e}", error=str(e))
+        return {"dataset_name": dataset_name, "status": "failed", "error": str(e), "events": events}
 
 
-def download_dataset_parallel(config_name: str, source: str = None, proxy="", cache_dir=None, max_workers: int = 5):
+def download_dataset_parallel(config_name: str, source: str = None, proxy="", cache_dir=None, max_workers: int = 5, storage: str = "files", reporter=None):
     """
     使用多进程并发下载指定的数据集。
     
@@ -370,104 +604,124 @@ def download_dataset_parallel(config_name: str, source: str = None, proxy="", ca
         proxy: 代理地址，空字符串表示不使用代理
         cache_dir: 缓存目录，如果为None则使用默认目录
         max_workers: 最大并发进程数，默认为5
+        storage: 存储后端，"files" 保留解压后的目录，"pack" 将整个配置打包为单个容器文件
+        reporter: 进度事件分发器（ProgressReporter）；子进程中的事件在每个数据集完成后回放给它
         
     Returns:
-        下载结果
+        下载结果，其中 "metrics" 为本次下载的吞吐量、分阶段耗时与延迟分位数
     """
-    import os
-    import multiprocessing as mp
     from pathlib import Path
     from functools import partial
-    
-    # 如果未指定数据源，自动选择
-    if source is None:
-        source = auto_select_source(proxy=proxy)
-    
-    # 获取数据集列表
-    datasets_list = get_datasets_list(config_name)
-    
-    # 设置缓存目录
-    if cache_dir is None:
-        cache_dir = Path.cwd() / ".sim_datasets"
-    else:
-        cache_dir = Path(cache_dir)
-    
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    
-    # 设置代理环境变量
-    if proxy:
-        os.environ['HTTP_PROXY'] = proxy
-        os.environ['HTTPS_PROXY'] = proxy
-    
-    # 创建下载单个数据集的包装函数
-    def download_single_wrapper(dataset_name):
-        """包装函数，用于多进程调用"""
-        try:
-            dataset_dir = cache_dir / Path(dataset_name)
-            
-            # 检查是否已经缓存
-            if dataset_dir.exists() and any(dataset_dir.iterdir()):
-                print(f"数据集 {dataset_name} 已缓存，跳过下载")
-                return {"dataset_name": dataset_name, "status": "cached", "error": None}
-            
-            # 下载数据集
-            result = download_single_dataset(dataset_name, source=source, proxy=proxy, cache_dir=cache_dir)
-            if result.get("success"):
-                print(f"数据集 {dataset_name} 下载完成")
-                return {"dataset_name": dataset_name, "status": "success", "result": result, "error": None}
-            error = result["files"].get("package.tar.gz", {}).get("error", "unknown_error")
-            print(f"数据集 {dataset_name} 下载失败: {error}")
-            return {"dataset_name": dataset_name, "status": "failed", "result": result, "error": error}
-            
-        except Exception as e:
-            print(f"数据集 {dataset_name} 下载失败: {e}")
-            return {"dataset_name": dataset_name, "status": "failed", "error": str(e)}
-    
-    # 使用进程池进行并发下载
-    print(f"开始并发下载 {len(datasets_list)} 个数据集，最大并发数: {max_workers}")
-    
-    downloaded_datasets = []
-    failed_datasets = []
-    cached_datasets = []
-    
-    # 限制并发数不超过数据集数量
-    actual_workers = min(max_workers, len(datasets_list))
-    
-    with mp.Pool(processes=actual_workers) as pool:
-        # 使用map进行并发处理
-        results = pool.map(download_single_wrapper, datasets_list)
-    
-    # 处理结果
-    for result in results:
-        dataset_name = result["dataset_name"]
-        status = result["status"]
+
+    from .events import MetricsAggregator, get_reporter
+    
+    metrics = MetricsAggregator()
+    reporter = get_reporter(reporter)
+    # metrics 只在本次调用期间挂在调用方的 reporter 上，保留其子类行为
+    with reporter.attached(metrics):
+        # 获取数据集列表
+        datasets_list = get_datasets_list(config_name)
+    
+        # 设置缓存目录
+        if cache_dir is None:
+            cache_dir = Path.cwd() / ".sim_datasets"
+        else:
+            cache_dir = Path(cache_dir)
+    
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        pack_file, packed = _open_pack_index(config_name, datasets_list, cache_dir, storage)
+    
+        # 代理环境变量只在下载期间生效，出错时同样会恢复
+        with _proxy_env(proxy):
+            downloaded_datasets = []
+            failed_datasets = []
+            # 已缓存的数据集在父进程中直接跳过，不再分发给进程池
+            cached_datasets = []
+            pending_datasets = []
+            # 下载前就已存在的目录缓存可能被其他配置共享，打包时保留其目录
+            directory_hits = []
+            for dataset_name in datasets_list:
+                dataset_dir = cache_dir / Path(dataset_name)
+                if dataset_name in packed:
+                    reporter.emit("cache_hit", dataset_name, message=f"数据集 {dataset_name} 已在容器中缓存，跳过下载", location="pack")
+                    cached_datasets.append(dataset_name)
+                elif dataset_dir.exists() and any(dataset_dir.iterdir()):
+                    reporter.emit("cache_hit", dataset_name, message=f"数据集 {dataset_name} 已缓存，跳过下载", location="directory")
+                    cached_datasets.append(dataset_name)
+                    directory_hits.append(dataset_name)
+                else:
+                    pending_datasets.append(dataset_name)
+    
+            if pending_datasets:
+                _check_decompress_backend()
+            # 如果未指定数据源，仅在有数据集需要下载时才自动选择；全部命中缓存时不做任何网络探测
+            if source is None and pending_datasets:
+                source = auto_select_source(proxy=proxy, reporter=reporter)
+    
+            # 工作函数必须定义在模块级别才能被进程池序列化
+            download_single_wrapper = partial(
+                _download_single_worker, source=source, proxy=proxy, cache_dir=cache_dir, quiet=reporter.quiet
+            )
+    
+            # 使用进程池进行并发下载
+            reporter.info(f"开始并发下载 {len(pending_datasets)} 个数据集，最大并发数: {max_workers}")
+    
+            # 限制并发数不超过数据集数量
+            actual_workers = min(max_workers, len(pending_datasets))
+    
+            results = []
+            if pending_datasets:
+                # 全部命中缓存时不加载 multiprocessing
+                import multiprocessing as mp
         
-        if status == "success":
-            downloaded_datasets.append(dataset_name)
-        elif status == "failed":
-            failed_datasets.append(dataset_name)
-        elif status == "cached":
-            cached_datasets.append(dataset_name)
-    
-    # 清理代理环境变量
-    if proxy:
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-    
-    print(f"\n下载完成统计:")
-    print(f"  总数据集数: {len(datasets_list)}")
-    print(f"  成功下载: {len(downloaded_datasets)}")
-    print(f"  已缓存: {len(cached_datasets)}")
-    print(f"  失败: {len(failed_datasets)}")
-    
-    return {
-        "config_name": config_name,
-        "cache_dir": str(cache_dir),
-        "total_datasets": len(datasets_list),
-        "downloaded": downloaded_datasets,
-        "cached": cached_datasets,
-        "failed": failed_datasets,
-        "success_count": len(downloaded_datasets) + len(cached_datasets),
-        "failed_count": len(failed_datasets),
-        "max_workers": actual_workers,
-    }
+                with mp.Pool(processes=actual_workers) as pool:
+                    # 按完成顺序逐个回放子进程事件，慢数据集不会拖住已完成数据集的事件
+                    for result in pool.imap_unordered(download_single_wrapper, pending_datasets):
+                        for record in result.pop("events"):
+                            reporter.dispatch(record)
+                        results.append(result)
+                # 结果恢复为数据集列表中的顺序
+                order = {name: index for index, name in enumerate(pending_datasets)}
+                results.sort(key=lambda result: order[result["dataset_name"]])
+    
+            # 处理结果
+            for result in results:
+                dataset_name = result["dataset_name"]
+                status = result["status"]
+        
+                if status == "success":
+                    downloaded_datasets.append(dataset_name)
+                elif status == "failed":
+                    failed_datasets.append(dataset_name)
+                elif status == "cached":
+                    cached_datasets.append(dataset_name)
+                    directory_hits.append(dataset_name)
+    
+        if pack_file is not None:
+            from .storage import pack_datasets
+
+            packed_now = pack_datasets(
+                downloaded_datasets + cached_datasets, pack_file, cache_dir=cache_dir, keep_sources=directory_hits
+            )
+            reporter.info(f"已将 {len(packed_now)} 个数据集写入容器 {pack_file}")
+    
+        reporter.info(f"\n下载完成统计:")
+        reporter.info(f"  总数据集数: {len(datasets_list)}")
+        reporter.info(f"  成功下载: {len(downloaded_datasets)}")
+        reporter.info(f"  已缓存: {len(cached_datasets)}")
+        reporter.info(f"  失败: {len(failed_datasets)}")
+    
+        return {
+            "config_name": config_name,
+            "cache_dir": str(cache_dir),
+            "total_datasets": len(datasets_list),
+            "downloaded": downloaded_datasets,
+            "cached": cached_datasets,
+            "failed": failed_datasets,
+            "success_count": len(downloaded_datasets) + len(cached_datasets),
+            "failed_count": len(failed_datasets),
+            "max_workers": actual_workers,
+            "storage": storage,
+            "pack_path": str(pack_file) if pack_file is not None else None,
+            "metrics": metrics.summary(),
+        }
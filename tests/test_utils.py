@@ -1,20 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import csv
 import os
+import shutil
 import socketserver
+import subprocess
 import sys
 import tarfile
 import threading
+import zipfile
 from functools import partial
 from http.server import SimpleHTTPRequestHandler
 from pathlib import Path
 
+import pytest
+
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(REPO_ROOT / "src"))
 
-from sim_datasets import utils  # noqa: E402
+from sim_datasets import async_utils, decompress, events, offline, plan, registry, storage, utils  # noqa: E402
 
 
 def _write_csv(path: Path, header: list[str], rows: list[list[object]]) -> None:
@@ -25,6 +32,26 @@ def _write_csv(path: Path, header: list[str], rows: list[list[object]]) -> None:
         writer.writerows(rows)
 
 
+def _write_package(source_root: Path, dataset_name: str) -> None:
+    dataset_dir = source_root / dataset_name
+    _write_csv(dataset_dir / "train.csv", ["x0", "target"], [[1.0, 2.0], [2.0, 4.0]])
+    with tarfile.open(dataset_dir / "package.tar.gz", "w:gz") as tar:
+        tar.add(dataset_dir / "train.csv", arcname="train.csv")
+
+
+@contextlib.contextmanager
+def _serve_directory(root: Path):
+    handler = partial(SimpleHTTPRequestHandler, directory=str(root))
+    with socketserver.ThreadingTCPServer(("127.0.0.1", 0), handler) as httpd:
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{httpd.server_address[1]}"
+        finally:
+            httpd.shutdown()
+            thread.join(timeout=5)
+
+
 def test_get_datasets_list_supports_srbench2025() -> None:
     datasets = utils.get_datasets_list("srbench2025")
     assert len(datasets) == 24
@@ -49,6 +76,44 @@ def test_get_datasets_list_supports_top_level_classic_benchmarks() -> None:
     assert "vladislavleva/Vladislavleva-8" in vladislavleva
 
 
+def test_get_datasets_list_supports_glob_selection() -> None:
+    easy = utils.get_datasets_list("srsd/srsd-feynman_easy/*")
+
+    assert easy == sorted(utils.get_datasets_list("srsd/srsd-feynman_easy"))
+    assert "srsd/srsd-feynman_easy_dummy/feynman-i.12.1" not in easy
+
+
+def test_get_datasets_list_raises_for_unknown_config() -> None:
+    try:
+        utils.get_datasets_list("no-such-config")
+    except FileNotFoundError as e:
+        assert "no-such-config.txt" in str(e)
+    else:
+        raise AssertionError("expected FileNotFoundError")
+
+
+def test_config_registry_queries() -> None:
+    reg = registry.ConfigRegistry(
+        {
+            "a": ("x/1", "x/2", "y/1"),
+            "b": ("x/2", "z/1"),
+        }
+    )
+
+    assert reg.with_prefix("x/") == ["x/1", "x/2"]
+    assert reg.glob("*/1") == ["x/1", "y/1", "z/1"]
+    assert reg.regex(r"^[yz]/") == ["y/1", "z/1"]
+    assert reg.configs_containing("x/2") == ["a", "b"]
+    assert reg.union("a", "b") == ["x/1", "x/2", "y/1", "z/1"]
+    assert reg.intersection("a", "b") == ["x/2"]
+    assert reg.difference("a", "b") == ["x/1", "y/1"]
+
+    reg.register("c/d", ["z/1", "w/1"])
+    assert reg.get("c.d") == ["z/1", "w/1"]
+    assert reg.configs_containing("z/1") == ["b", "c.d"]
+    assert registry.get_registry() is registry.get_registry()
+
+
 def test_download_dataset_tracks_failures_and_honors_cache_dir(tmp_path: Path, monkeypatch) -> None:
     monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["ok/ds", "bad/ds"])
 
@@ -122,3 +187,519 @@ def test_download_single_dataset_supports_base_url_override(tmp_path: Path, monk
     assert (extracted_dir / "id_test.csv").exists()
     assert (extracted_dir / "metadata.yaml").exists()
     assert not (extracted_dir / "package.tar.gz").exists()
+
+
+def test_pack_datasets_supports_random_access_and_mmap(tmp_path: Path) -> None:
+    cache_dir = tmp_path / "cache"
+    _write_csv(cache_dir / "bench/a/train.csv", ["x0", "target"], [[1.0, 2.0]])
+    (cache_dir / "bench/b/sub").mkdir(parents=True)
+    (cache_dir / "bench/b/sub/metadata.yaml").write_text("name: b\n", encoding="utf-8")
+
+    pack_file = storage.pack_path("bench", cache_dir)
+    packed = storage.pack_datasets(["bench/a", "bench/b", "bench/missing"], pack_file, cache_dir=cache_dir)
+
+    assert packed == ["bench/a", "bench/b"]
+    assert not (cache_dir / "bench").exists()
+
+    with storage.open_pack("bench", cache_dir) as pack:
+        assert "bench/a" in pack
+        assert "bench/missing" not in pack
+        assert "bench/b/sub" not in pack
+        assert pack.datasets() == ["bench/a", "bench/b"]
+        assert pack.files("bench/b") == ["sub/metadata.yaml"]
+        assert pack.read("bench/b", "sub/metadata.yaml") == b"name: b\n"
+        view = pack.memoryview("bench/a", "train.csv")
+        assert bytes(view) == pack.read("bench/a", "train.csv")
+        view.release()
+
+
+def test_download_dataset_pack_storage_skips_packed_datasets(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["bench/a", "bench/b"])
+    calls = []
+
+    def fake_download(dataset_name: str, source: str | None = None, proxy: str = "", cache_dir=None):
+        calls.append(dataset_name)
+        _write_csv(Path(cache_dir) / dataset_name / "train.csv", ["x0"], [[1.0]])
+        return {"dataset_name": dataset_name, "cache_path": str(Path(cache_dir) / dataset_name), "files": {}, "success": True}
+
+    monkeypatch.setattr(utils, "download_single_dataset", fake_download)
+
+    cache_dir = tmp_path / "cache"
+    first = utils.download_dataset("bench", source="modelscope", cache_dir=cache_dir, storage="pack")
+    second = utils.download_dataset("bench", source="modelscope", cache_dir=cache_dir, storage="pack")
+
+    assert calls == ["bench/a", "bench/b"]
+    assert first["pack_path"] == str(cache_dir / "bench.pack.zip")
+    assert second["downloaded"] == ["bench/a", "bench/b"]
+    assert sorted(p.name for p in cache_dir.iterdir()) == ["bench.pack.zip", "bench.pack.zip.lock"]
+
+
+def test_pack_storage_keeps_directory_caches_shared_with_other_configs(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["bench/shared", "bench/new"])
+
+    def fake_download(dataset_name: str, source: str | None = None, proxy: str = "", cache_dir=None):
+        _write_csv(Path(cache_dir) / dataset_name / "train.csv", ["x0"], [[1.0]])
+        return {"dataset_name": dataset_name, "cache_path": str(Path(cache_dir) / dataset_name), "files": {}, "success": True}
+
+    monkeypatch.setattr(utils, "download_single_dataset", fake_download)
+
+    cache_dir = tmp_path / "cache"
+    # 另一个配置以目录形式缓存的数据集
+    _write_csv(cache_dir / "bench/shared/train.csv", ["x0"], [[2.0]])
+    utils.download_dataset("bench", source="modelscope", cache_dir=cache_dir, storage="pack")
+
+    assert (cache_dir / "bench/shared/train.csv").exists()
+    assert not (cache_dir / "bench/new").exists()
+    with storage.open_pack("bench", cache_dir) as pack:
+        assert pack.datasets() == ["bench/shared", "bench/new"]
+
+
+def test_pack_datasets_replaces_container_atomically(tmp_path: Path, monkeypatch) -> None:
+    cache_dir = tmp_path / "cache"
+    pack_file = storage.pack_path("bench", cache_dir)
+    _write_csv(cache_dir / "bench/a/train.csv", ["x0"], [[1.0]])
+    storage.pack_datasets(["bench/a"], pack_file, cache_dir=cache_dir)
+    _write_csv(cache_dir / "bench/b/train.csv", ["x0"], [[2.0]])
+
+    # 模拟写入过程中进程被中断
+    def interrupted(self, *args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(zipfile.ZipFile, "write", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        storage.pack_datasets(["bench/a", "bench/b"], pack_file, cache_dir=cache_dir)
+    monkeypatch.undo()
+
+    assert (cache_dir / "bench/b/train.csv").exists()
+    assert [p.name for p in cache_dir.iterdir() if p.name.endswith(".tmp")] == []
+    with storage.DatasetPack(pack_file) as pack:
+        assert pack.datasets() == ["bench/a"]
+
+    assert storage.pack_datasets(["bench/a", "bench/b"], pack_file, cache_dir=cache_dir) == ["bench/b"]
+    with storage.DatasetPack(pack_file) as pack:
+        assert pack.datasets() == ["bench/a", "bench/b"]
+        assert pack.read("bench/a", "train.csv") == b"x0\r\n1.0\r\n"
+
+    pack_file.write_bytes(b"not a zip")
+    with pytest.raises(ValueError, match="已损坏"):
+        utils._open_pack_index("bench", ["bench/a"], cache_dir, "pack")
+
+
+def test_adownload_dataset_matches_sync_result_schema(tmp_path: Path, monkeypatch) -> None:
+    pytest.importorskip("aiohttp")
+    source_root = tmp_path / "source_root"
+    _write_package(source_root, "bench/ok")
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["bench/ok", "bench/missing"])
+
+    cache_dir = tmp_path / "cache"
+    with _serve_directory(source_root) as base_url:
+        monkeypatch.setenv("SIM_DATASETS_MODELSCOPE_BASE_URL", base_url)
+        result = asyncio.run(
+            async_utils.adownload_dataset("bench", source="modelscope", cache_dir=cache_dir)
+        )
+
+    assert result["downloaded"] == ["bench/ok"]
+    assert result["failed"] == ["bench/missing"]
+    assert (cache_dir / "bench/ok/train.csv").exists()
+    assert not (cache_dir / "bench/ok/package.tar.gz").exists()
+    assert not list(cache_dir.rglob("*.part"))
+
+
+def test_transient_server_errors_are_retried_and_counted(tmp_path: Path, monkeypatch) -> None:
+    pytest.importorskip("aiohttp")
+    source_root = tmp_path / "source_root"
+    _write_package(source_root, "bench/flaky")
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["bench/flaky", "bench/missing"])
+    monkeypatch.setattr(utils, "_RETRY_BACKOFF", 0)
+    failed_once = set()
+
+    class FlakyHandler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            # 每个存在的压缩包第一次请求返回 503，之后正常返回；不存在的文件直接 404，不重试
+            if self.path not in failed_once and (source_root / self.path.lstrip("/")).exists():
+                failed_once.add(self.path)
+                self.send_error(503)
+                return
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    handler = partial(FlakyHandler, directory=str(source_root))
+    with socketserver.ThreadingTCPServer(("127.0.0.1", 0), handler) as httpd:
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        monkeypatch.setenv("SIM_DATASETS_MODELSCOPE_BASE_URL", f"http://127.0.0.1:{httpd.server_address[1]}")
+        try:
+            runs = (
+                lambda cache_dir, reporter: utils.download_dataset("bench", source="modelscope", cache_dir=cache_dir, reporter=reporter),
+                lambda cache_dir, reporter: asyncio.run(
+                    async_utils.adownload_dataset("bench", source="modelscope", cache_dir=cache_dir, reporter=reporter)
+                ),
+            )
+            for index, run in enumerate(runs):
+                failed_once.clear()
+                records = []
+                reporter = events.ProgressReporter(callbacks=[records.append], quiet=True)
+                result = run(tmp_path / f"cache{index}", reporter)
+                retries = [r for r in records if r["event"] == "retry"]
+                assert result["downloaded"] == ["bench/flaky"]
+                assert result["failed"] == ["bench/missing"]
+                assert [(r["dataset_name"], r["attempt"], r["error"]) for r in retries] == [("bench/flaky", 1, "HTTP 503")]
+                assert result["metrics"]["retries"] == 1
+        finally:
+            httpd.shutdown()
+            thread.join(timeout=5)
+
+
+def test_adownload_single_dataset_buffers_large_archives_intact(tmp_path: Path, monkeypatch) -> None:
+    pytest.importorskip("aiohttp")
+    source_root = tmp_path / "source_root"
+    dataset_dir = source_root / "bench/big"
+    payload = os.urandom(3 * async_utils._WRITE_BUFFER_SIZE + 12345)
+    (dataset_dir / "blob.bin").parent.mkdir(parents=True)
+    (dataset_dir / "blob.bin").write_bytes(payload)
+    with tarfile.open(dataset_dir / "package.tar.gz", "w:gz", compresslevel=1) as tar:
+        tar.add(dataset_dir / "blob.bin", arcname="blob.bin")
+
+    cache_dir = tmp_path / "cache"
+    with _serve_directory(source_root) as base_url:
+        monkeypatch.setenv("SIM_DATASETS_MODELSCOPE_BASE_URL", base_url)
+        result = asyncio.run(
+            async_utils.adownload_single_dataset("bench/big", source="modelscope", cache_dir=cache_dir)
+        )
+
+    assert result["success"]
+    assert (cache_dir / "bench/big/blob.bin").read_bytes() == payload
+    assert not list(cache_dir.rglob("*.part"))
+
+
+def test_adownload_single_dataset_cleans_up_when_cancelled(tmp_path: Path, monkeypatch) -> None:
+    pytest.importorskip("aiohttp")
+    release = threading.Event()
+
+    class SlowHandler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(1 << 20))
+            self.end_headers()
+            self.wfile.write(b"\x1f\x8b" + b"\0" * 65534)
+            self.wfile.flush()
+            release.wait(timeout=10)
+
+        def log_message(self, *args):
+            pass
+
+    cache_dir = tmp_path / "cache"
+    dataset_dir = cache_dir / "bench/slow"
+
+    async def cancel_mid_stream():
+        task = asyncio.create_task(
+            async_utils.adownload_single_dataset("bench/slow", source="modelscope", cache_dir=cache_dir)
+        )
+        part = dataset_dir / "package.tar.gz.part"
+        for _ in range(500):
+            if part.exists():
+                break
+            await asyncio.sleep(0.01)
+        assert part.exists()
+        task.cancel()
+        await task
+
+    with socketserver.ThreadingTCPServer(("127.0.0.1", 0), SlowHandler) as httpd:
+        httpd.daemon_threads = True
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        monkeypatch.setenv("SIM_DATASETS_MODELSCOPE_BASE_URL", f"http://127.0.0.1:{httpd.server_address[1]}")
+        try:
+            with pytest.raises(asyncio.CancelledError):
+                asyncio.run(cancel_mid_stream())
+        finally:
+            release.set()
+            httpd.shutdown()
+            thread.join(timeout=5)
+
+    assert not list(dataset_dir.glob("*.part"))
+    assert not (dataset_dir / "package.tar.gz").exists()
+
+
+def test_download_single_dataset_emits_events_and_metrics(tmp_path: Path, monkeypatch, capsys) -> None:
+    source_root = tmp_path / "source_root"
+    _write_package(source_root, "bench/ok")
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["bench/ok", "bench/missing"])
+
+    class TaggingReporter(events.ProgressReporter):
+        def emit(self, event, dataset_name=None, message=None, **fields):
+            return super().emit(event, dataset_name, message, tagged=True, **fields)
+
+    received = []
+    log_path = tmp_path / "events.jsonl"
+    reporter = TaggingReporter(callbacks=[received.append], quiet=True, log_path=log_path)
+
+    with _serve_directory(source_root) as base_url:
+        monkeypatch.setenv("SIM_DATASETS_MODELSCOPE_BASE_URL", base_url)
+        result = utils.download_dataset("bench", source="modelscope", cache_dir=tmp_path / "cache", reporter=reporter)
+
+    assert capsys.readouterr().out == ""
+    assert [(r["event"], r["dataset_name"]) for r in received if r["event"] != "bytes_received"] == [
+        ("start", "bench/ok"),
+        ("extract_start", "bench/ok"),
+        ("extract_finish", "bench/ok"),
+        ("finish", "bench/ok"),
+        ("start", "bench/missing"),
+        ("failure", "bench/missing"),
+    ]
+    assert len(log_path.read_text(encoding="utf-8").splitlines()) == len(received)
+    # 子类的重写对下载内部发出的事件同样生效，metrics 回调在下载结束后被移除
+    assert all(r["tagged"] for r in received)
+    assert reporter.callbacks == [received.append]
+
+    metrics = result["metrics"]
+    assert metrics["bytes"] == (tmp_path / "source_root/bench/ok/package.tar.gz").stat().st_size
+    assert metrics["finished"] == 1
+    assert metrics["failures"] == 1
+    assert metrics["latency"]["count"] == 2
+    assert metrics["latency"]["p50"] <= metrics["latency"]["p99"]
+
+
+def test_export_import_roundtrip_is_pure_cache_hit(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["bench/a", "bench/b", "bench/c"])
+    source_cache = tmp_path / "online"
+    _write_csv(source_cache / "bench/a/train.csv", ["x0"], [[1.0]])
+    _write_csv(source_cache / "bench/b/nested/valid.csv", ["x0"], [[2.0]])
+
+    archive = tmp_path / "bench.tar"
+    exported = offline.export_cache("bench", archive, cache_dir=source_cache)
+    assert exported["exported"] == ["bench/a", "bench/b"]
+    assert exported["missing"] == ["bench/c"]
+
+    target_cache = tmp_path / "offline"
+    restored = offline.import_cache(archive, cache_dir=target_cache, max_workers=4)
+    assert restored["success"] is True
+    assert (target_cache / "bench/b/nested/valid.csv").read_bytes() == (
+        source_cache / "bench/b/nested/valid.csv"
+    ).read_bytes()
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("network access on a fully cached config")
+
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["bench/a", "bench/b"])
+    monkeypatch.setattr(utils, "check_ip_location", no_network)
+    monkeypatch.setattr(utils, "download_single_dataset", no_network)
+    result = utils.download_dataset("bench", cache_dir=target_cache)
+    assert result["downloaded"] == ["bench/a", "bench/b"]
+
+
+def test_packed_export_roundtrip_is_pure_cache_hit(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["bench/a", "bench/b"])
+    source_cache = tmp_path / "online"
+    _write_csv(source_cache / "bench/a/train.csv", ["x0"], [[1.0]])
+    _write_csv(source_cache / "bench/b/train.csv", ["x0"], [[2.0]])
+    storage.pack_datasets(["bench/a", "bench/b"], storage.pack_path("bench", source_cache), source_cache)
+
+    archive = tmp_path / "bench.tar"
+    exported = offline.export_cache("bench", archive, cache_dir=source_cache)
+    assert exported["storage"] == "pack"
+
+    target_cache = tmp_path / "offline"
+    restored = offline.import_cache(archive, cache_dir=target_cache)
+    assert restored["storage"] == "pack"
+    assert restored["datasets"] == ["bench/a", "bench/b"]
+    assert not (target_cache / "bench").exists()
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("network access on a fully cached config")
+
+    monkeypatch.setattr(utils, "check_ip_location", no_network)
+    monkeypatch.setattr(utils, "download_single_dataset", no_network)
+    for storage_mode in ("files", "pack"):
+        result = utils.download_dataset("bench", cache_dir=target_cache, storage=storage_mode)
+        assert result["downloaded"] == ["bench/a", "bench/b"]
+    assert plan.plan_download("bench", cache_dir=target_cache)["fetch_count"] == 0
+
+
+def test_import_cache_rejects_corrupted_members(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["bench/a"])
+    _write_csv(tmp_path / "online/bench/a/train.csv", ["x0"], [[1.0]])
+    archive = tmp_path / "bench.tar"
+    offline.export_cache("bench", archive, cache_dir=tmp_path / "online")
+
+    data = bytearray(archive.read_bytes())
+    index = data.index(b"x0\r\n1.0")
+    data[index] = ord("y")
+    archive.write_bytes(bytes(data))
+
+    restored = offline.import_cache(archive, cache_dir=tmp_path / "offline")
+    assert restored["success"] is False
+    assert not (tmp_path / "offline/bench/a/train.csv").exists()
+
+
+def test_import_cache_discards_datasets_with_any_bad_file(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["bench/a", "bench/b"])
+    _write_csv(tmp_path / "online/bench/a/train.csv", ["x0"], [[1.0]])
+    _write_csv(tmp_path / "online/bench/a/valid.csv", ["x0"], [[5.0]])
+    _write_csv(tmp_path / "online/bench/b/train.csv", ["x0"], [[3.0]])
+    archive = tmp_path / "bench.tar"
+    offline.export_cache("bench", archive, cache_dir=tmp_path / "online")
+
+    data = bytearray(archive.read_bytes())
+    index = data.index(b"x0\r\n5.0")
+    data[index] = ord("y")
+    archive.write_bytes(bytes(data))
+
+    target_cache = tmp_path / "offline"
+    restored = offline.import_cache(archive, cache_dir=target_cache, max_workers=2)
+    assert restored["success"] is False
+    assert restored["datasets"] == ["bench/b"]
+    assert restored["failed_datasets"] == ["bench/a"]
+    assert not (target_cache / "bench/a").exists()
+    assert (target_cache / "bench/b/train.csv").exists()
+    assert sorted(p.name for p in target_cache.iterdir()) == ["bench"]
+
+    calls = []
+
+    def fake_download(dataset_name: str, source: str | None = None, proxy: str = "", cache_dir=None):
+        calls.append(dataset_name)
+        return {"dataset_name": dataset_name, "cache_path": None, "files": {}, "success": True}
+
+    monkeypatch.setattr(utils, "download_single_dataset", fake_download)
+    utils.download_dataset("bench", source="modelscope", cache_dir=target_cache)
+    assert calls == ["bench/a"]
+
+
+def test_extract_archive_reports_backend_and_supports_zstd(tmp_path: Path, monkeypatch) -> None:
+    _write_package(tmp_path / "src", "a/ds")
+    package = tmp_path / "src" / "a" / "ds" / "package.tar.gz"
+
+    backend = decompress.extract_archive(package, tmp_path / "gz", backend="stdlib")
+    assert backend == "stdlib"
+    assert (tmp_path / "gz" / "train.csv").read_text(encoding="utf-8").startswith("x0,target")
+
+    monkeypatch.setenv("SIM_DATASETS_DECOMPRESS_BACKEND", "pigz")
+    monkeypatch.setattr(decompress, "backend_available", lambda name: name == "stdlib")
+    with pytest.raises(ValueError):
+        decompress.extract_archive(package, tmp_path / "forced")
+    monkeypatch.undo()
+
+    # 小压缩包自动选择时不启动子进程
+    monkeypatch.setattr(decompress, "backend_available", lambda name: name in ("pigz", "stdlib"))
+    assert decompress.select_backend("gzip") == "pigz"
+    assert decompress.select_backend("gzip", size=1024) == "stdlib"
+    assert decompress.select_backend("gzip", backend="pigz", size=1024) == "pigz"
+    monkeypatch.undo()
+
+    zstd = shutil.which("zstd")
+    if zstd is None:
+        pytest.skip("zstd command not available")
+    raw = tmp_path / "package.tar"
+    with tarfile.open(raw, "w") as tar:
+        tar.add(tmp_path / "src" / "a" / "ds" / "train.csv", arcname="train.csv")
+    subprocess.run([zstd, "-q", str(raw), "-o", str(tmp_path / "package.tar.zst")], check=True)
+
+    assert decompress.detect_format(tmp_path / "package.tar.zst") == "zstd"
+    assert decompress.extract_archive(tmp_path / "package.tar.zst", tmp_path / "zst", backend="zstd") == "zstd"
+    assert (tmp_path / "zst" / "train.csv").exists()
+
+
+def test_truncated_archive_leaves_nothing_and_is_refetched(tmp_path: Path, monkeypatch) -> None:
+    source_root = tmp_path / "hub"
+    dataset_dir = source_root / "b/ok"
+    for i in range(2):
+        _write_csv(dataset_dir / f"f{i}.csv", ["x0"], [[float(j)] for j in range(2000)])
+    with tarfile.open(dataset_dir / "package.tar.gz", "w:gz") as tar:
+        for i in range(2):
+            tar.add(dataset_dir / f"f{i}.csv", arcname=f"f{i}.csv")
+    good = (dataset_dir / "package.tar.gz").read_bytes()
+    (dataset_dir / "package.tar.gz").write_bytes(good[: len(good) * 2 // 3])
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["b/ok"])
+
+    cache_dir = tmp_path / "cache"
+    with _serve_directory(source_root) as base_url:
+        monkeypatch.setenv("SIM_DATASETS_MODELSCOPE_BASE_URL", base_url)
+        first = utils.download_dataset("b", source="modelscope", cache_dir=cache_dir)
+        assert first["failed"] == ["b/ok"]
+        assert [p for p in (cache_dir / "b").rglob("*") if p.is_file()] == []
+        assert [p.name for p in (cache_dir / "b").iterdir()] == ["ok"]
+
+        (dataset_dir / "package.tar.gz").write_bytes(good)
+        second = utils.download_dataset("b", source="modelscope", cache_dir=cache_dir)
+
+    assert second["downloaded"] == ["b/ok"]
+    assert sorted(p.name for p in (cache_dir / "b/ok").iterdir()) == ["f0.csv", "f1.csv"]
+
+
+def test_bad_decompress_backend_fails_before_download(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("SIM_DATASETS_DECOMPRESS_BACKEND", "no-such-backend")
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["b/ok"])
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("download started with an invalid backend")
+
+    import requests
+
+    monkeypatch.setattr(requests, "get", no_network)
+    monkeypatch.delenv("HTTP_PROXY", raising=False)
+    monkeypatch.setenv("HTTPS_PROXY", "http://caller-proxy:3128")
+    for download in (utils.download_dataset, utils.download_dataset_parallel):
+        with pytest.raises(ValueError, match="no-such-backend"):
+            download("b", source="modelscope", proxy="http://127.0.0.1:9", cache_dir=tmp_path / "cache")
+        # 出错时代理环境变量恢复为调用前的状态
+        assert "HTTP_PROXY" not in os.environ
+        assert os.environ["HTTPS_PROXY"] == "http://caller-proxy:3128"
+
+
+def test_plan_download_diffs_cache_and_sizes_pending(tmp_path: Path, monkeypatch) -> None:
+    source_root = tmp_path / "hub"
+    for name in ("a/ds1", "a/ds2"):
+        _write_package(source_root, name)
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["a/ds1", "a/ds2", "a/missing"])
+    cache_dir = tmp_path / "cache"
+    _write_csv(cache_dir / "a" / "ds1" / "train.csv", ["x0"], [[1.0]])
+
+    with _serve_directory(source_root) as base_url:
+        monkeypatch.setenv("SIM_DATASETS_MODELSCOPE_BASE_URL", base_url)
+        result = plan.plan_download("a", source="modelscope", cache_dir=cache_dir)
+
+    assert result["cached"] == ["a/ds1"]
+    assert result["to_fetch"] == ["a/ds2", "a/missing"]
+    assert result["total_bytes"] == (source_root / "a" / "ds2" / "package.tar.gz").stat().st_size
+    assert result["errors"] == {"a/missing": "HTTP 404"}
+    assert result["throughput_bytes_per_second"] > 0
+    assert result["free_bytes"] > 0
+    assert not (cache_dir / "a" / "ds2").exists()
+
+    # 全部命中缓存时不发起网络请求
+    monkeypatch.setattr(utils, "get_datasets_list", lambda _: ["a/ds1"])
+
+    def no_network(**_):
+        raise AssertionError("cached plan must not touch the network")
+
+    monkeypatch.setattr(utils, "auto_select_source", no_network)
+    cached = plan.plan_download("a", cache_dir=cache_dir)
+    assert cached["fetch_count"] == 0 and cached["estimated_seconds"] == 0.0
+
+
+def test_import_and_listing_do_not_load_download_dependencies() -> None:
+    heavy = ("requests", "tarfile", "multiprocessing", "aiohttp")
+    code = (
+        "import json, sys; before = set(sys.modules); "
+        "import sim_datasets; sim_datasets.get_datasets_list('nguyen'); "
+        "from sim_datasets.__main__ import main; main(['nguyen', '--list-only']); "
+        f"print(json.dumps([m for m in {heavy!r} if m in sys.modules and m not in before]))"
+    )
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT / "src"))
+    proc = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True)
+
+    assert proc.stdout.strip().splitlines()[-1] == "[]"
+
+    import sim_datasets
+
+    assert sim_datasets.download_dataset is utils.download_dataset
+    assert "plan_download" in dir(sim_datasets)
+    with pytest.raises(AttributeError):
+        sim_datasets.no_such_name
+
+    # 未显式导入子模块时，通过包属性访问子模块仍然可用
+    code = "import sim_datasets; print(sim_datasets.utils.__name__, sim_datasets.plan.plan_download.__module__)"
+    proc = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True)
+    assert proc.stdout.split() == ["sim_datasets.utils", "sim_datasets.plan"]